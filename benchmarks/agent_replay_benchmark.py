@@ -0,0 +1,295 @@
+"""
+Offline end-to-end replay: scripted conversations through the router and
+`get_agent` with a deterministic local chat model instead of Groq. The tools
+run for real, against a temporary tickets database and checkpointer and the
+real FAQ index / embedding model.
+
+    python -m benchmarks.agent_replay_benchmark --iterations 5
+    python -m benchmarks.agent_replay_benchmark --iterations 5 --save-baseline
+    python -m benchmarks.agent_replay_benchmark --iterations 5 --tolerance 0.2   # exit 1 on regression
+
+Reports per-stage timings (routing, model, tools, FAQ retrieval, SQL) and
+turn throughput. Stages are compared against the stored baseline (--baseline),
+and any that got slower by more than --tolerance are flagged. Record the
+baseline on the machine that runs the comparison; timings do not transfer
+between machines.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from sqlalchemy import event
+
+from src.agent import get_agent
+from src.async_tools import stream_turn
+from src.checkpointer import BoundedSqliteSaver
+from src.db import DB_PROFILE, SessionLocal, make_engine
+from src.faq_retriever import get_faq_metrics, get_faq_retriever
+from src.migrations import run_migrations
+from src.models import Base
+from src.router import IntentRouter, record_routed_turn
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "agent_replay_baseline.json")
+UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+TICKET_ID = "$ticket_id"
+
+# Each turn: the user message, the tool calls the model makes for it (none ->
+# direct reply) and the final reply ("{tool}" is replaced by the tool output).
+CONVERSATIONS = {
+    "faq": [
+        {"user": "hi", "reply": "Hello! How can I help you today?"},
+        {"user": "How do I reset my password?", "tools": [("faq_tool", {"original_query": "How do I reset my password?"})], "reply": "{tool}"},
+        {"user": "What payment methods do you accept?", "tools": [("faq_tool", {"original_query": "What payment methods do you accept?"})], "reply": "{tool}"},
+        {"user": "thanks!", "reply": "You're welcome!"},
+    ],
+    "tickets": [
+        {"user": "Please create a high priority ticket for user alice: the mobile app crashes on login",
+         "tools": [("create_ticket", {"user": "alice", "subject": "Mobile app crashes on login",
+                                      "description": "The mobile app crashes right after entering credentials", "priority": "high"})],
+         "reply": "{tool}"},
+        {"user": f"Update ticket {TICKET_ID} to in progress and assign it to bob",
+         "tools": [("update_ticket", {"ticket_id": TICKET_ID, "status": "in_progress", "assigned_to": "bob"})], "reply": "{tool}"},
+        {"user": f"What's the status of ticket {TICKET_ID}?", "tools": [("check_ticket", {"ticket_id": TICKET_ID})], "reply": "{tool}"},
+        {"user": "How do I reset my password? Also list my tickets, I'm alice",
+         "tools": [("faq_tool", {"original_query": "How do I reset my password?"}), ("list_tickets", {"user": "alice", "limit": 20})],
+         "reply": "{tool}"},
+        {"user": "Search tickets about crashes", "tools": [("search_tickets", {"query": "crash*"})], "reply": "{tool}"},
+        {"user": f"Delete ticket {TICKET_ID}", "tools": [("delete_ticket", {"ticket_id": TICKET_ID})], "reply": "{tool}"},
+    ],
+    "escalation": [
+        {"user": "My invoice was charged twice and I want to talk to a human agent",
+         "tools": [("get_human_agent_response", {"user_input": "User was charged twice on an invoice and asks for a human."})],
+         "reply": "🔹 Connected with Alex now 🔹\n{tool}"},
+        {"user": "ok, please have someone look into it, my human contact can email me",
+         "tools": [("get_human_agent_response", {"user_input": "User asks for a follow-up email about the double charge."})],
+         "reply": "{tool}"},
+    ],
+}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatGroq. Answers the turn whose user message
+    matches the last human message (ticket UUIDs normalized to $ticket_id):
+    first with the scripted tool calls, then, once tool results are in, with
+    the scripted reply. Also plays the human agent and the summarizer.
+    """
+
+    script: dict
+    human_reply: str = "Hi, I'm Alex 😊 I've looked into this and will follow up by email today."
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def _respond(self, messages) -> AIMessage:
+        system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+        if "You are Alex" in system:
+            return AIMessage(content=self.human_reply)
+        if "running summary" in system:
+            return AIMessage(content="User alice reported a crashing mobile app; ticket created and updated.")
+
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=None)
+        if last_human is None:
+            return AIMessage(content="How can I help?")
+        turn = self.script.get(UUID_RE.sub(TICKET_ID, messages[last_human].content))
+        if turn is None:
+            return AIMessage(content="Sorry, I didn't catch that.")
+
+        tool_outputs = [m.content for m in messages[last_human + 1:] if isinstance(m, ToolMessage)]
+        if turn.get("tools") and not tool_outputs:
+            ticket_ids = [tid for m in messages if isinstance(m, ToolMessage) for tid in UUID_RE.findall(str(m.content))]
+            calls = []
+            for i, (name, args) in enumerate(turn["tools"]):
+                args = {k: (ticket_ids[-1] if v == TICKET_ID and ticket_ids else v) for k, v in args.items()}
+                calls.append({"name": name, "args": args, "id": f"call_{len(messages)}_{i}"})
+            return AIMessage(content="", tool_calls=calls)
+        return AIMessage(content=turn["reply"].replace("{tool}", "\n".join(str(o) for o in tool_outputs)))
+
+
+class StageTimer(BaseCallbackHandler):
+    """Collects durations per stage from LangChain callbacks (model and tool runs)."""
+
+    def __init__(self):
+        self.samples = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def _start(self, run_id, stage):
+        self._started[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id):
+        stage, start = self._started.pop(run_id, (None, None))
+        if stage is not None:
+            self.add(stage, time.perf_counter() - start)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "model")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tools")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+def attach_sql_timer(engine, timer: StageTimer):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timer.add("sql", time.perf_counter() - conn.info["query_start"].pop())
+
+
+def replay(agent, router: Optional[IntentRouter], conversation: List[dict], timer: StageTimer) -> dict:
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": [timer]}
+    ticket_id, sources = None, []
+    for turn in conversation:
+        message = turn["user"].replace(TICKET_ID, ticket_id or TICKET_ID)
+        start = time.perf_counter()
+        routed = router.route(message) if router is not None else None
+        if router is not None:
+            timer.add("routing", time.perf_counter() - start)
+        if routed is not None:
+            record_routed_turn(agent, config, message, routed.reply)
+            sources.append(routed.source)
+        else:
+            faq_before = get_faq_metrics()["query_seconds_total"]
+            for chunk in stream_turn(agent, message, config):
+                for tool_message in chunk.get("tools", {}).get("messages", []):
+                    ticket_id = next(iter(UUID_RE.findall(str(tool_message.content))), ticket_id)
+            retrieval = get_faq_metrics()["query_seconds_total"] - faq_before
+            if retrieval:
+                timer.add("retrieval", retrieval)
+            sources.append("agent")
+        timer.add("turn", time.perf_counter() - start)
+    return {"sources": sources}
+
+
+def summarize(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "total_s": sum(ordered),
+        "p50_ms": 1000 * statistics.median(ordered),
+        "p99_ms": 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for stage, stats in result["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base and base["p50_ms"] > 0 and stats["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p50 {stats['p50_ms']:.2f} ms vs baseline {base['p50_ms']:.2f} ms")
+    base_tps = baseline.get("turns_per_s")
+    if base_tps and result["turns_per_s"] < base_tps * (1 - tolerance):
+        regressions.append(f"throughput: {result['turns_per_s']:.2f} turns/s vs baseline {base_tps:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=3, help="replays of every conversation")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed replays first (model load, caches)")
+    parser.add_argument("--conversations", default=",".join(CONVERSATIONS))
+    parser.add_argument("--no-router", action="store_true", help="send every turn to the agent")
+    parser.add_argument("--profile", default=DB_PROFILE)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.conversations.split(",") if n.strip()]
+    script = {turn["user"]: turn for name in names for turn in CONVERSATIONS[name]}
+    llm = ScriptedChatModel(script=script)
+    get_faq_retriever()
+
+    original_bind = SessionLocal.kw["bind"]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", args.profile)
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        SessionLocal.configure(bind=engine)
+        checkpointer = BoundedSqliteSaver(os.path.join(tmp, "checkpoints.db"))
+        try:
+            agent = get_agent("offline", llm=llm, checkpointer=checkpointer)
+            router = None if args.no_router else IntentRouter()
+            for _ in range(args.warmup):
+                for name in names:
+                    replay(agent, router, CONVERSATIONS[name], StageTimer())
+
+            timer = StageTimer()
+            attach_sql_timer(engine, timer)
+            sources = {}
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                for name in names:
+                    for source in replay(agent, router, CONVERSATIONS[name], timer)["sources"]:
+                        sources[source] = sources.get(source, 0) + 1
+            elapsed = time.perf_counter() - start
+        finally:
+            SessionLocal.configure(bind=original_bind)
+            engine.dispose()
+
+    turns = len(timer.samples["turn"])
+    result = {
+        "turns": turns,
+        "turns_per_s": turns / elapsed,
+        "stages": {stage: summarize(samples) for stage, samples in sorted(timer.samples.items())},
+    }
+
+    print(f"{turns} turns in {elapsed:.2f}s ({result['turns_per_s']:.1f} turns/s); handled by {sources}")
+    print(f"{'stage':<10} {'count':>6} {'total s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<10} {stats['count']:>6} {stats['total_s']:>9.3f} {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(result, json.load(f), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Throughput of the per-row ticket tools vs the bulk API on a temporary database.
+
+    python -m benchmarks.bulk_tickets_benchmark --rows 5000 --chunk-size 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src import crud
+from src.db import DB_PROFILE, SessionLocal, make_engine
+from src.migrations import run_migrations
+from src.models import Base
+
+
+def spec(i: int) -> dict:
+    return {"user": f"user{i % 100}", "subject": f"Imported email #{i}", "description": "Customer reports the app crashes on start", "priority": "low"}
+
+
+def timed(label: str, rows: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {rows:>7} rows {elapsed:>8.2f}s {rows / elapsed:>10.0f} rows/s")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=crud.BULK_CHUNK_SIZE)
+    parser.add_argument("--profile", default=DB_PROFILE)
+    args = parser.parse_args(argv)
+
+    original_bind = SessionLocal.kw["bind"]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", args.profile)
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        SessionLocal.configure(bind=engine)
+        try:
+            single_ids = timed("create_ticket tool (1 txn/row)", args.rows, lambda: [
+                crud.create_ticket.invoke(spec(i)).split("#", 1)[1].split(" ", 1)[0] for i in range(args.rows)
+            ])
+            results = timed("bulk_create_tickets", args.rows, lambda: crud.bulk_create_tickets(
+                [spec(i) for i in range(args.rows)], chunk_size=args.chunk_size))
+            bulk_ids = [r["id"] for r in results if r["ok"]]
+
+            timed("update_ticket tool (1 txn/row)", len(single_ids), lambda: [
+                crud.update_ticket.invoke({"ticket_id": ticket_id, "status": "closed"}) for ticket_id in single_ids
+            ])
+            timed("bulk_update_tickets (ids)", len(bulk_ids), lambda: crud.bulk_update_tickets(
+                ticket_ids=bulk_ids, status="closed", chunk_size=args.chunk_size))
+            timed("bulk_update_tickets (filter)", args.rows * 2, lambda: crud.bulk_update_tickets(
+                filters={"status": "closed"}, status="resolved", chunk_size=args.chunk_size))
+
+            timed("delete_ticket tool (1 txn/row)", len(single_ids), lambda: [
+                crud.delete_ticket.invoke({"ticket_id": ticket_id}) for ticket_id in single_ids
+            ])
+            timed("bulk_delete_tickets (ids)", len(bulk_ids), lambda: crud.bulk_delete_tickets(
+                ticket_ids=bulk_ids, chunk_size=args.chunk_size))
+        finally:
+            SessionLocal.configure(bind=original_bind)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
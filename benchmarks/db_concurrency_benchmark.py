@@ -0,0 +1,109 @@
+"""
+Mixed create / update / list / check tool calls from many threads against a
+temporary tickets database, once per engine profile (see src/db.py).
+
+    python -m benchmarks.db_concurrency_benchmark --threads 16 --ops 200
+    python -m benchmarks.db_concurrency_benchmark --profiles legacy,wal
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src import crud
+from src.db import ENGINE_PROFILES, SessionLocal, make_engine
+from src.migrations import run_migrations
+from src.models import Base, Ticket
+
+
+def worker(worker_id: int, ops: int, ticket_ids: list, lock: threading.Lock, seed: int):
+    rng = random.Random(seed + worker_id)
+    latencies, errors = [], 0
+    user = f"user{worker_id}"
+    for _ in range(ops):
+        roll = rng.random()
+        start = time.perf_counter()
+        try:
+            if roll < 0.3:
+                out = crud.create_ticket.invoke({"user": user, "subject": "Cannot log in", "description": "Password reset email never arrives"})
+                if out.startswith("✅"):
+                    with lock:
+                        ticket_ids.append(out.split("#", 1)[1].split(" ", 1)[0])
+            elif roll < 0.55:
+                with lock:
+                    ticket_id = rng.choice(ticket_ids)
+                crud.update_ticket.invoke({"ticket_id": ticket_id, "status": rng.choice(["in_progress", "resolved", "closed"])})
+            elif roll < 0.85:
+                crud.list_tickets.invoke({"user": user, "limit": 20})
+            else:
+                with lock:
+                    ticket_id = rng.choice(ticket_ids)
+                crud.check_ticket.invoke({"ticket_id": ticket_id})
+        except Exception as e:  # "database is locked" and friends
+            errors += 1
+            if "locked" not in str(e):
+                raise
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_profile(profile: str, threads: int, ops: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile)
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        SessionLocal.configure(bind=engine)
+        try:
+            with SessionLocal() as session:
+                seeded = [Ticket(user=f"user{i % threads}", subject="Seed ticket", description="seed") for i in range(200)]
+                session.add_all(seeded)
+                session.commit()
+                ticket_ids = [t.id for t in seeded]
+
+            lock = threading.Lock()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                futures = [pool.submit(worker, i, ops, ticket_ids, lock, seed) for i in range(threads)]
+                results = [f.result() for f in futures]
+            elapsed = time.perf_counter() - start
+        finally:
+            engine.dispose()
+
+    latencies = sorted(lat for lats, _ in results for lat in lats)
+    total = len(latencies)
+    return {
+        "profile": profile,
+        "ops": total,
+        "ops_per_s": total / elapsed,
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p99_ms": 1000 * latencies[min(total - 1, int(total * 0.99))],
+        "locked_errors": sum(errors for _, errors in results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=200, help="tool calls per thread")
+    parser.add_argument("--profiles", default=",".join(ENGINE_PROFILES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    original_bind = SessionLocal.kw["bind"]
+    try:
+        rows = [run_profile(p.strip(), args.threads, args.ops, args.seed) for p in args.profiles.split(",") if p.strip()]
+    finally:
+        SessionLocal.configure(bind=original_bind)
+
+    print(f"{args.threads} threads x {args.ops} mixed tool calls")
+    print(f"{'profile':<8} {'ops':>6} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'locked':>7}")
+    for r in rows:
+        print(f"{r['profile']:<8} {r['ops']:>6} {r['ops_per_s']:>8.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['locked_errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
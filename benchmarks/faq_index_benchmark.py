@@ -0,0 +1,116 @@
+"""
+Recall-vs-latency benchmark for the FAQ index backends in src/faq_index.py.
+
+Every backend is compared against the exact flat index on the same corpus:
+build/train time, serialized size, batched query latency and recall@k.
+
+    python -m benchmarks.faq_index_benchmark --rows 50000 --queries 1000 --k 5
+    python -m benchmarks.faq_index_benchmark --from-index ./src/faq_faiss_index
+
+The default corpus is synthetic (clustered unit vectors, 768-d like mpnet) so
+it can be scaled to the size of a real knowledge base. --from-index
+benchmarks the vectors of a built FAQ index instead, queried with its own
+rows plus noise.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from src.faq_index import INDEX_TYPES, configure_search, create_index, index_spec, recall_at_k, train_index
+
+
+def synthetic_corpus(rows: int, queries: int, dim: int, clusters: int, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    assign = rng.integers(0, clusters, size=rows)
+    data = centers[assign] + 0.35 * rng.standard_normal((rows, dim)).astype("float32")
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    picks = rng.integers(0, rows, size=queries)
+    query = data[picks] + 0.05 * rng.standard_normal((queries, dim)).astype("float32")
+    query /= np.linalg.norm(query, axis=1, keepdims=True)
+    return data, query.astype("float32")
+
+
+def index_corpus(index_dir: str, queries: int, seed: int):
+    index = faiss.read_index(f"{index_dir}/index.faiss")
+    data = index.reconstruct_n(0, index.ntotal).astype("float32")
+    rng = np.random.default_rng(seed)
+    query = data[rng.integers(0, len(data), size=queries)]
+    query = query + 0.05 * rng.standard_normal(query.shape).astype("float32")
+    return data, query.astype("float32")
+
+
+def run(kind: str, spec_overrides: dict, data: np.ndarray, query: np.ndarray, k: int, truth):
+    spec = index_spec(type=kind, **spec_overrides)
+    start = time.perf_counter()
+    index = create_index(spec, data.shape[1], len(data))
+    train_index(index, data)
+    index.add(data)
+    build_seconds = time.perf_counter() - start
+    configure_search(index, spec)
+
+    index.search(query[:10], k)  # warm-up
+    start = time.perf_counter()
+    _, found = index.search(query, k)
+    search_seconds = time.perf_counter() - start
+
+    return {
+        "type": kind,
+        "build_s": build_seconds,
+        "size_mb": faiss.serialize_index(index).nbytes / 1e6,
+        "ms_per_query": 1000 * search_seconds / len(query),
+        "qps": len(query) / search_seconds if search_seconds else float("inf"),
+        "recall": recall_at_k(truth, found) if truth is not None else 1.0,
+        "found": found,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="comma-separated backends")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, default=None)
+    parser.add_argument("--hnsw-m", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--pq-m", type=int, default=None)
+    parser.add_argument("--from-index", default=None, help="use vectors from a built FAISS index directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.from_index:
+        data, query = index_corpus(args.from_index, args.queries, args.seed)
+    else:
+        data, query = synthetic_corpus(args.rows, args.queries, args.dim, args.clusters, args.seed)
+    k = min(args.k, len(data))
+    overrides = {"nlist": args.nlist, "nprobe": args.nprobe, "hnsw_m": args.hnsw_m,
+                 "ef_search": args.ef_search, "pq_m": args.pq_m}
+
+    print(f"corpus: {data.shape[0]} x {data.shape[1]}, queries: {len(query)}, k={k}")
+    baseline = run("flat", overrides, data, query, k, None)
+    truth = baseline["found"]
+    results = [baseline]
+    skipped = []
+    for kind in [t.strip() for t in args.types.split(",") if t.strip() and t.strip() != "flat"]:
+        try:
+            results.append(run(kind, overrides, data, query, k, truth))
+        except ValueError as e:  # e.g. ivfpq on a corpus too small to train its codebooks
+            skipped.append((kind, str(e)))
+
+    print(f"{'type':<7} {'build s':>9} {'size MB':>9} {'ms/query':>9} {'qps':>10} {'recall@k':>9} {'speedup':>8}")
+    for r in results:
+        speedup = baseline["ms_per_query"] / r["ms_per_query"] if r["ms_per_query"] else float("inf")
+        print(f"{r['type']:<7} {r['build_s']:>9.2f} {r['size_mb']:>9.1f} {r['ms_per_query']:>9.3f} "
+              f"{r['qps']:>10.0f} {r['recall']:>9.3f} {speedup:>7.1f}x")
+    for kind, reason in skipped:
+        print(f"{kind:<7} skipped: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Load test for a running support API (src/server.py): N concurrent sessions,
+each with its own thread_id, sending `--turns` messages back to back. Run at
+several concurrency levels and report latency percentiles, plus how many
+concurrent sessions each worker sustains within the p99 budget.
+
+    GROQ_API_KEY=... uvicorn src.server:app --workers 2
+    python -m benchmarks.server_load_benchmark --url http://127.0.0.1:8000 --concurrency 1,8,32,64 --workers 2
+    python -m benchmarks.server_load_benchmark --mode tickets --concurrency 16,64,256
+
+Modes: "chat" streams each turn over SSE (time to first token and full
+reply), "tickets" mixes ticket create / list / get calls (no LLM involved).
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+import httpx
+
+CHAT_MESSAGES = [
+    "How do I reset my password?",
+    "What payment methods do you accept?",
+    "Can I change the email on my account?",
+    "How long does a refund take?",
+    "thanks!",
+]
+
+
+async def chat_session(client: httpx.AsyncClient, turns: int, rng: random.Random, samples: list):
+    thread_id = str(uuid.uuid4())
+    for _ in range(turns):
+        body = {"message": rng.choice(CHAT_MESSAGES), "thread_id": thread_id}
+        start = time.perf_counter()
+        first_token, ok = None, False
+        try:
+            async with client.stream("POST", "/chat/stream", json=body) as response:
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        if event == "token" and first_token is None:
+                            first_token = time.perf_counter() - start
+                        ok = ok or event == "done"
+                ok = ok and response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        samples.append((time.perf_counter() - start, first_token, ok))
+
+
+async def tickets_session(client: httpx.AsyncClient, turns: int, rng: random.Random, samples: list):
+    user = f"load-{uuid.uuid4().hex[:8]}"
+    ticket_ids = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        try:
+            roll = rng.random()
+            if roll < 0.3 or not ticket_ids:
+                response = await client.post("/tickets", json={"user": user, "subject": "Cannot log in", "description": "Reset email never arrives"})
+                if response.status_code == 201:
+                    ticket_ids.append(response.json()["id"])
+            elif roll < 0.7:
+                response = await client.get("/tickets", params={"user": user, "page_size": 20})
+            else:
+                response = await client.get(f"/tickets/{rng.choice(ticket_ids)}")
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - start
+        samples.append((elapsed, elapsed, ok))
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run_level(url: str, mode: str, sessions: int, turns: int, timeout: float, seed: int) -> dict:
+    samples = []
+    session = chat_session if mode == "chat" else tickets_session
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(session(client, turns, random.Random(seed + i), samples) for i in range(sessions)))
+        elapsed = time.perf_counter() - start
+    latencies = [s[0] for s in samples if s[2]]
+    first_tokens = [s[1] for s in samples if s[2] and s[1] is not None]
+    return {
+        "sessions": sessions,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s[2]),
+        "rps": len(samples) / elapsed,
+        "p50_ms": 1000 * statistics.median(latencies) if latencies else None,
+        "p99_ms": 1000 * percentile(latencies, 0.99) if latencies else None,
+        "ttft_p50_ms": 1000 * statistics.median(first_tokens) if first_tokens else None,
+    }
+
+
+def fmt(value, spec=">9.1f"):
+    return format(value, spec) if value is not None else f"{'—':>9}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=["chat", "tickets"], default="chat")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated session counts")
+    parser.add_argument("--turns", type=int, default=5, help="messages / requests per session")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers serving --url")
+    parser.add_argument("--p99-budget-ms", type=float, default=None,
+                        help="latency budget for the sessions-per-worker figure (default: 5000 chat, 200 tickets)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    budget = args.p99_budget_ms or (5000.0 if args.mode == "chat" else 200.0)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    rows = [asyncio.run(run_level(args.url, args.mode, n, args.turns, args.timeout, args.seed)) for n in levels]
+
+    print(f"{args.mode} against {args.url}: {args.turns} turns per session, {args.workers} worker(s)")
+    print(f"{'sessions':>8} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'ttft ms':>9}")
+    for r in rows:
+        print(f"{r['sessions']:>8} {r['requests']:>6} {r['errors']:>6} {r['rps']:>8.1f} "
+              f"{fmt(r['p50_ms'])} {fmt(r['p99_ms'])} {fmt(r['ttft_p50_ms'])}")
+
+    within = [r["sessions"] for r in rows if not r["errors"] and r["p99_ms"] is not None and r["p99_ms"] <= budget]
+    if within:
+        print(f"concurrent sessions per worker within p99 <= {budget:.0f} ms: {max(within) / args.workers:.1f}")
+    else:
+        print(f"no concurrency level stayed within p99 <= {budget:.0f} ms without errors")
+
+
+if __name__ == "__main__":
+    main()
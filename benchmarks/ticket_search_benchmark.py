@@ -0,0 +1,98 @@
+"""
+Compare ticket search strategies on a synthetic ticket table:
+the LIKE '%q%' scan that search_tickets used to run vs the FTS5 index.
+
+    python -m benchmarks.ticket_search_benchmark --rows 300000 --repeat 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.crud import _search_fts, _search_like
+from src.migrations import run_migrations
+from src.models import Base
+
+WORDS = (
+    "login password reset account locked email verification refund order shipping delayed damaged "
+    "invoice billing charge card declined subscription cancel upgrade app crash error timeout sync "
+    "mobile desktop browser printer network vpn export report dashboard slow missing item warranty"
+).split()
+
+QUERIES = ["refund", "password reset", '"card declined"', "crash*", "vpn timeout", "warranty missing item", "nonexistentword"]
+
+
+def populate(engine, rows: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        batch = []
+        for i in range(rows):
+            subject = " ".join(rng.choices(WORDS, k=4)).capitalize()
+            description = " ".join(rng.choices(WORDS, k=30)) + f" ERR-{rng.randint(1000, 9999)}"
+            created = start + timedelta(minutes=i)
+            batch.append((str(uuid.uuid4()), f"user{rng.randint(1, 5000)}", subject, description,
+                          rng.choice(["low", "medium", "high", "urgent"]), rng.choice(["open", "in_progress", "resolved", "closed"]),
+                          created, created))
+            if len(batch) == 10_000:
+                cur.executemany(
+                    "INSERT INTO tickets (id, user, subject, description, priority, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                batch.clear()
+        if batch:
+            cur.executemany(
+                "INSERT INTO tickets (id, user, subject, description, priority, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def time_search(Session, search, query: str, limit: int, repeat: int):
+    best, count = float("inf"), 0
+    for _ in range(repeat):
+        with Session() as session:
+            start = time.perf_counter()
+            count = len(search(session, query, limit))
+            best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", future=True)
+        Base.metadata.create_all(bind=engine)
+        # Create the FTS index first so the triggers index rows as they are inserted.
+        if not run_migrations(engine).get("ticket_fts"):
+            print("This SQLite build has no FTS5 module; nothing to compare.")
+            return
+        start = time.perf_counter()
+        populate(engine, args.rows, args.seed)
+        print(f"{args.rows} tickets inserted (with FTS triggers) in {time.perf_counter() - start:.1f}s")
+
+        Session = sessionmaker(bind=engine, future=True)
+        print(f"{'query':<26} {'LIKE ms':>9} {'rows':>5} {'FTS5 ms':>9} {'rows':>5} {'speedup':>8}")
+        for query in QUERIES:
+            like_s, like_n = time_search(Session, _search_like, query.replace("*", "").replace('"', ""), args.limit, args.repeat)
+            fts_s, fts_n = time_search(Session, _search_fts, query, args.limit, args.repeat)
+            print(f"{query:<26} {like_s * 1000:>9.1f} {like_n:>5} {fts_s * 1000:>9.1f} {fts_n:>5} {like_s / fts_s:>7.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
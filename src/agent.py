@@ -1,28 +1,46 @@
-from langchain_groq import ChatGroq
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import InMemorySaver
 
-from src.crud import (create_ticket,update_ticket,delete_ticket,check_ticket,list_tickets,search_tickets,get_current_datetime,)
+from src.crud import (create_ticket,update_ticket,delete_ticket,check_ticket,list_tickets,search_tickets,ticket_statistics,get_current_datetime,)
+from src.async_tools import with_async_tools
+from src.checkpointer import get_checkpointer
+from src.context import ConversationContext
 from src.faq_retriever import faq_tool
 from src.human_agent import create_human_agent
+from src.llm_clients import chat_model, release_http_clients, key_fingerprint
+
+AGENT_MODEL = "llama-3.3-70b-versatile"
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+# Compiled graphs kept per (model, API key); more keys than this evict the least recently used.
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "8"))
 
-def get_agent(api_key: str):
+def build_agent(api_key: str, model: str = AGENT_MODEL, llm=None, checkpointer=None):
     """
     Assemble an agent that:
       - Always checks FAQ first.
       - Only calls ticket tools when necessary and with validated params.
       - Routes to human when user asks explicitly.
+    `llm` replaces every Groq model (agent, summarizer, human agent) and
+    `checkpointer` the shared one, e.g. for the offline replay benchmark.
     """
-    get_human_agent_response = create_human_agent(api_key)
-    tools = [faq_tool,get_current_datetime,create_ticket,update_ticket,delete_ticket,check_ticket,list_tickets,search_tickets,get_human_agent_response]
+    get_human_agent_response = create_human_agent(api_key, model=model, llm=llm, checkpointer=checkpointer)
+    tools = [faq_tool,get_current_datetime,create_ticket,update_ticket,delete_ticket,check_ticket,list_tickets,search_tickets,ticket_statistics,get_human_agent_response]
+    # Async variants with per-tool timeouts; under astream one step's tool calls run concurrently.
+    tools = with_async_tools(tools)
 
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0.0,  # deterministic
-        api_key=api_key,
-    )
+    summarizer = llm
+    if llm is None:
+        llm = chat_model(
+            model,
+            api_key,
+            temperature=0.0,  # deterministic
+        )
 
-    checkpointer = InMemorySaver()
+    checkpointer = checkpointer or get_checkpointer()
 
     # More structured, example-driven prompt to reduce hallucination and make tool usage deterministic.
     prompt = """
@@ -36,7 +54,8 @@ def get_agent(api_key: str):
     - If the FAQ returns an answer, reply with it directly. Never mention tools or internal processes.
 
     2. Intent Detection
-    - If FAQ is not used or provides no useful answer, determine the user’s intent: create / update / close / view / search / list / delete / escalate.
+    - If FAQ is not used or provides no useful answer, determine the user’s intent: create / update / close / view / search / list / delete / statistics / escalate.
+    - For counts, backlogs or time-to-close questions ("how many open urgent tickets?"), call `ticket_statistics` instead of listing tickets.
 
     3. Ticket Actions & Tool Calls
     - **Strict Parameter Collection with Memory:** 
@@ -102,5 +121,93 @@ def get_agent(api_key: str):
     # • When presenting ticket info, format it clearly and concisely (see Ticket Actions above).  
     # • If the user says "thank you", "thanks", "resolved", "bye", or "goodbye", acknowledge warmly, close politely, and return control to the Support Ticket Assistant.
 
-    agent_executor = create_react_agent(model=llm, tools=tools, prompt=prompt, checkpointer=checkpointer)
+    # Bound what each model call sees: recent turns + rolling summary of older ones.
+    # Summaries go to a small, cheap model.
+    if summarizer is None:
+        summarizer = chat_model(
+            SUMMARY_MODEL,
+            api_key,
+            temperature=0.0,
+            max_tokens=300,
+        )
+    context = ConversationContext(summarizer=summarizer, window_tokens=2000, summary_tokens=300, tool_output_tokens=400, system_prompt=prompt)
+
+    agent_executor = create_react_agent(model=llm, tools=tools, prompt=prompt, checkpointer=checkpointer, pre_model_hook=context)
     return agent_executor
+
+
+# ---- Shared agent factory ----
+# The compiled graph holds no per-user state: conversations are separated by
+# the thread_id in the run config (checkpointer, context summaries, human
+# agent thread), so one graph serves every session using the same key.
+_agents: "OrderedDict[tuple, object]" = OrderedDict()
+_agents_lock = threading.Lock()
+_build_locks: "dict[tuple, threading.Lock]" = {}
+_factory_stats = {"builds": 0, "reuses": 0, "build_seconds": 0.0, "build_rss_bytes": 0}
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_agent(api_key: str, model: str = AGENT_MODEL, llm=None, checkpointer=None):
+    """
+    Compiled agent for (model, api_key), built on first use and shared by all
+    sessions. Passing `llm` or `checkpointer` builds a private, uncached graph.
+    """
+    if llm is not None or checkpointer is not None:
+        return build_agent(api_key, model, llm=llm, checkpointer=checkpointer)
+    key = (model, key_fingerprint(api_key))
+    with _agents_lock:
+        agent = _agents.get(key)
+        if agent is not None:
+            _agents.move_to_end(key)
+            _factory_stats["reuses"] += 1
+            return agent
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    # One build per key, so concurrent first sessions don't each compile a graph;
+    # hits and builds for other keys don't wait on it.
+    with build_lock:
+        with _agents_lock:
+            agent = _agents.get(key)
+            if agent is not None:
+                _agents.move_to_end(key)
+                _factory_stats["reuses"] += 1
+                return agent
+        start, rss = time.perf_counter(), _rss_bytes()
+        agent = build_agent(api_key, model)
+        seconds, rss_delta = time.perf_counter() - start, max(0, _rss_bytes() - rss)
+        with _agents_lock:
+            _factory_stats["builds"] += 1
+            _factory_stats["build_seconds"] += seconds
+            _factory_stats["build_rss_bytes"] += rss_delta
+            _agents[key] = agent
+            evicted = []
+            while len(_agents) > AGENT_CACHE_SIZE:
+                evicted.append(_agents.popitem(last=False)[0])
+            # Pools are per key; stop handing them out once no cached or in-flight graph uses the key.
+            live = {fingerprint for _, fingerprint in [*_agents, *_build_locks]}
+            orphaned = {fingerprint for _, fingerprint in evicted if fingerprint not in live}
+            _build_locks.pop(key, None)
+    for fingerprint in orphaned:
+        release_http_clients(fingerprint)
+    return agent
+
+
+def agent_factory_stats() -> dict:
+    """Builds vs reuses, and the startup time / RSS each reuse avoided (average cost of a build)."""
+    with _agents_lock:
+        stats = dict(_factory_stats, cached_graphs=len(_agents))
+    builds = stats["builds"]
+    avg_seconds = stats["build_seconds"] / builds if builds else None
+    avg_rss = stats["build_rss_bytes"] / builds if builds else None
+    stats["avg_build_seconds"] = avg_seconds
+    stats["avg_build_rss_bytes"] = avg_rss
+    stats["saved_seconds"] = stats["reuses"] * avg_seconds if builds else None
+    stats["saved_rss_bytes"] = stats["reuses"] * avg_rss if builds else None
+    return stats
@@ -0,0 +1,155 @@
+"""
+Async execution of the agent's tools and an `astream` driver for the UI.
+
+Every tool keeps its synchronous implementation (the router, batch jobs and
+benchmarks call `.invoke`). `with_async` adds a coroutine to each one:
+
+  - ticket tools run on a thread pool sized to the SQLite connection pool,
+  - the FAQ tool runs on its own small pool, so FAISS / embedding work never
+    waits behind database writes,
+  - tools that already have a coroutine (the human agent) run on the loop,
+
+and each call is bounded by a per-tool timeout. On timeout the model gets an
+error string back instead of the turn hanging. The offloaded thread cannot be
+interrupted, so a timed-out write may still complete.
+
+When the agent is driven through `astream`, LangGraph's ToolNode gathers all
+tool calls of one model step, so independent calls (FAQ lookup + list_tickets)
+run concurrently. All async work runs on one background event loop per process.
+The async HTTP clients the chat models hold are bound to that loop, so it must
+outlive a single turn. `stream_turn` exposes the stream to synchronous callers
+such as Streamlit.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from src.db import DB_PROFILE, ENGINE_PROFILES
+
+logger = logging.getLogger(__name__)
+
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "15"))
+TOOL_TIMEOUTS: Dict[str, float] = {
+    "faq_tool": float(os.getenv("FAQ_TOOL_TIMEOUT_SECONDS", "10")),
+    "get_human_agent_response": float(os.getenv("HUMAN_AGENT_TIMEOUT_SECONDS", "60")),
+}
+FAQ_TOOLS = frozenset({"faq_tool"})
+
+_db_profile = ENGINE_PROFILES[DB_PROFILE]
+# One worker per pooled connection; more would only queue on pool_timeout.
+DB_WORKERS = int(os.getenv("TOOL_DB_WORKERS", str((_db_profile.pool_size or 5) + _db_profile.max_overflow)))
+FAQ_WORKERS = int(os.getenv("TOOL_FAQ_WORKERS", "2"))
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="tool-db")
+_faq_executor = ThreadPoolExecutor(max_workers=FAQ_WORKERS, thread_name_prefix="tool-faq")
+
+
+def tool_timeout(name: str) -> float:
+    return TOOL_TIMEOUTS.get(name, TOOL_TIMEOUT_SECONDS)
+
+
+def with_async(sync_tool: BaseTool, timeout: Optional[float] = None) -> BaseTool:
+    """Copy of `sync_tool` with a timed coroutine (offloaded to a thread pool unless it is already async)."""
+    name = sync_tool.name
+    seconds = timeout if timeout is not None else tool_timeout(name)
+    func = getattr(sync_tool, "func", None)
+    native = getattr(sync_tool, "coroutine", None)
+
+    if native is not None:
+        async def run(*args, **kwargs):
+            return await native(*args, **kwargs)
+    else:
+        executor = _faq_executor if name in FAQ_TOOLS else _db_executor
+
+        async def run(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            # Keep the caller's context (current trace, see src.telemetry) in the worker thread.
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(executor, functools.partial(context.run, func, *args, **kwargs))
+
+    @functools.wraps(func or native)
+    async def coroutine(*args, **kwargs):
+        try:
+            return await asyncio.wait_for(run(*args, **kwargs), timeout=seconds)
+        except asyncio.TimeoutError:
+            logger.warning("tool %s timed out after %.1fs", name, seconds)
+            return f"❌ {name} timed out after {seconds:g}s. The operation may still complete; check before retrying."
+
+    return StructuredTool(
+        name=name,
+        description=sync_tool.description,
+        args_schema=sync_tool.args_schema,
+        func=func,
+        coroutine=coroutine,
+        return_direct=sync_tool.return_direct,
+    )
+
+
+def with_async_tools(tools: List[BaseTool]) -> List[BaseTool]:
+    return [with_async(t) for t in tools]
+
+
+# ---- Background event loop ----
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide loop all agent turns run on (started on first use)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro):
+    """Run `coro` on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+async def astream_turn(agent, message: str, config: dict):
+    """Yield the agent's per-node updates for one user message."""
+    async for chunk in agent.astream({"messages": [{"role": "user", "content": message}]}, stream_mode="updates", config=config):
+        yield chunk
+
+
+_DONE = object()
+
+
+def stream_turn(agent, message: str, config: dict) -> Iterator[dict]:
+    """Synchronous iterator over `astream_turn`, which runs on the background loop."""
+    chunks: "queue.Queue" = queue.Queue()
+    context = contextvars.copy_context()
+
+    async def pump():
+        for var, value in context.items():  # the task runs in its own copy of the loop's context
+            var.set(value)
+        try:
+            async for chunk in astream_turn(agent, message, config):
+                chunks.put(chunk)
+        except BaseException as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        future.cancel()  # the consumer stopped early
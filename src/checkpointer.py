@@ -0,0 +1,437 @@
+"""
+Bounded, persistent LangGraph checkpointer backed by a local SQLite file.
+
+Replaces InMemorySaver, which keeps every thread's full history in process
+memory forever and loses it on restart:
+
+  - per-thread TTL: threads idle longer than `ttl_seconds` are dropped
+  - LRU eviction: at most `max_threads` threads are kept (least recently used go first)
+  - message cap: at most `max_messages` messages are stored per thread; older
+    turns are cut at a user-message boundary so tool calls stay paired
+  - only the newest `keep_checkpoints` checkpoints per thread are kept
+  - compact storage: serializer output above `compress_threshold` bytes is zlib-compressed
+  - a small in-memory LRU of the latest checkpoint per thread serves repeat
+    reads; a hit is only used after checking it is still the thread's newest
+    checkpoint in the file (and has all its writes), so several worker
+    processes can share one database
+
+`usage()` reports memory and disk bytes per thread.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+DEFAULT_CHECKPOINT_PATH = Path(__file__).resolve().parent.parent / "data" / "checkpoints.db"
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS threads (
+        thread_id TEXT PRIMARY KEY,
+        last_access REAL NOT NULL,
+        message_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_threads_last_access ON threads (last_access)",
+    """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        type TEXT,
+        checkpoint BLOB,
+        metadata_type TEXT,
+        metadata BLOB,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT,
+        value BLOB,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    )
+    """,
+]
+
+
+def trim_messages_to_cap(messages: list, max_messages: int) -> list:
+    """
+    Keep at most `max_messages` of the newest messages, starting on a user
+    message so no tool result is separated from the call that produced it.
+    Without a user message in the window, leading tool results (whose call was
+    cut off) are dropped instead.
+    """
+    if max_messages <= 0 or len(messages) <= max_messages:
+        return messages
+    start = len(messages) - max_messages
+    for i in range(start, len(messages)):
+        if getattr(messages[i], "type", None) == "human":
+            return messages[i:]
+    while start < len(messages) and getattr(messages[start], "type", None) == "tool":
+        start += 1
+    return messages[start:]
+
+
+class BoundedSqliteSaver(BaseCheckpointSaver):
+    """SQLite checkpointer with TTL / LRU thread eviction and a per-thread message cap (see module docstring)."""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, *, ttl_seconds: float = 7 * 24 * 3600, max_threads: int = 10_000,
+                 max_messages: int = 200, keep_checkpoints: int = 3, hot_cache_threads: int = 256,
+                 compress_threshold: int = 1024, sweep_interval: float = 60.0, serde=None):
+        super().__init__(serde=serde)
+        self.path = str(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self.keep_checkpoints = max(1, keep_checkpoints)
+        self.hot_cache_threads = hot_cache_threads
+        self.compress_threshold = compress_threshold
+        self.sweep_interval = sweep_interval
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._lock = threading.RLock()
+        # (thread_id, checkpoint_ns) -> {"row": checkpoint row, "writes": {(task_id, idx): write row}}
+        self._hot: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._last_touch: Dict[str, float] = {}
+        self._last_sweep = 0.0
+
+    # ---- Serialization ----
+    def _dump(self, obj: Any) -> Tuple[str, bytes]:
+        type_, blob = self.serde.dumps_typed(obj)
+        if len(blob) > self.compress_threshold:
+            return f"z:{type_}", zlib.compress(blob, 6)
+        return type_, blob
+
+    def _load(self, type_: Optional[str], blob: Optional[bytes]) -> Any:
+        if type_ and type_.startswith("z:"):
+            return self.serde.loads_typed((type_[2:], zlib.decompress(blob)))
+        return self.serde.loads_typed((type_, blob))
+
+    # ---- Bookkeeping (callers hold self._lock) ----
+    def _touch(self, thread_id: str, message_count: Optional[int] = None, write: bool = False):
+        now = time.time()
+        if message_count is not None:
+            self._conn.execute(
+                "INSERT INTO threads (thread_id, last_access, message_count) VALUES (?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_access = excluded.last_access, message_count = excluded.message_count",
+                (thread_id, now, message_count),
+            )
+        elif write:
+            self._conn.execute(
+                "INSERT INTO threads (thread_id, last_access) VALUES (?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_access = excluded.last_access",
+                (thread_id, now),
+            )
+        elif now - self._last_touch.get(thread_id, 0.0) > 30:
+            # reads refresh recency at most every 30 s to keep them write-free
+            self._conn.execute("UPDATE threads SET last_access = ? WHERE thread_id = ?", (now, thread_id))
+        else:
+            return
+        self._last_touch[thread_id] = now
+
+    def _cache_put(self, key: Tuple[str, str], entry: dict):
+        self._hot[key] = entry
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_cache_threads:
+            self._hot.popitem(last=False)
+
+    def _cache_current(self, thread_id: str, checkpoint_ns: str, entry: dict, latest: bool) -> bool:
+        """Whether a hot entry still matches the file (another process may have written since)."""
+        checkpoint_id = entry["row"][0]
+        if latest:
+            row = self._conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if row is None or row[0] != checkpoint_id:
+                return False
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchone()[0]
+        return count == len(entry["writes"])
+
+    def _delete_threads(self, thread_ids: Sequence[str]):
+        for thread_id in thread_ids:
+            for table in ("checkpoints", "writes", "threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._last_touch.pop(thread_id, None)
+            for key in [k for k in self._hot if k[0] == thread_id]:
+                del self._hot[key]
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        expired = [row[0] for row in self._conn.execute(
+            "SELECT thread_id FROM threads WHERE last_access < ?", (now - self.ttl_seconds,))]
+        overflow = [row[0] for row in self._conn.execute(
+            "SELECT thread_id FROM threads ORDER BY last_access DESC LIMIT -1 OFFSET ?", (self.max_threads,))]
+        victims = list(dict.fromkeys(expired + overflow))
+        if victims:
+            self._conn.execute("BEGIN")
+            self._delete_threads(victims)
+            self._conn.execute("COMMIT")
+
+    def _prune_checkpoints(self, thread_id: str, checkpoint_ns: str):
+        keep = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_checkpoints)
+        subquery = ("SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT ?")
+        self._conn.execute(
+            f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({subquery})", keep)
+        self._conn.execute(
+            f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({subquery})", keep)
+
+    def _tuple_from_rows(self, thread_id: str, checkpoint_ns: str, row: tuple, writes: List[tuple]) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, blob, metadata_type, metadata_blob = row
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=self._load(type_, blob),
+            metadata=self._load(metadata_type, metadata_blob),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self._load(w_type, value)) for task_id, _, channel, w_type, value in writes],
+        )
+
+    def _fetch_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[tuple]:
+        return self._conn.execute(
+            "SELECT task_id, idx, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    # ---- BaseCheckpointSaver API ----
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        key = (thread_id, checkpoint_ns)
+        with self._lock:
+            entry = self._hot.get(key)
+            if (entry is not None and checkpoint_id in (None, entry["row"][0])
+                    and self._cache_current(thread_id, checkpoint_ns, entry, latest=checkpoint_id is None)):
+                self._hot.move_to_end(key)
+                row, writes = entry["row"], sorted(entry["writes"].values(), key=lambda w: (w[0], w[1]))
+            else:
+                if checkpoint_id:
+                    row = self._conn.execute(
+                        "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+                        "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                        (thread_id, checkpoint_ns, checkpoint_id),
+                    ).fetchone()
+                else:
+                    row = self._conn.execute(
+                        "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+                        "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                        (thread_id, checkpoint_ns),
+                    ).fetchone()
+                if row is None:
+                    return None
+                writes = self._fetch_writes(thread_id, checkpoint_ns, row[0])
+                if not checkpoint_id:
+                    self._cache_put(key, {"row": row, "writes": {(w[0], w[1]): w for w in writes}})
+            self._touch(thread_id)
+        return self._tuple_from_rows(thread_id, checkpoint_ns, row, writes)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(str(config["configurable"]["thread_id"]))
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                f"FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                tup = self._tuple_from_rows(thread_id, checkpoint_ns, tuple(row), self._fetch_writes(thread_id, checkpoint_ns, row[0]))
+                if filter and any(tup.metadata.get(k) != v for k, v in filter.items()):
+                    continue
+                results.append(tup)
+                if limit is not None and len(results) >= limit:
+                    break
+        yield from results
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+
+        channel_values = checkpoint.get("channel_values") or {}
+        messages = channel_values.get("messages")
+        if isinstance(messages, list):
+            trimmed = trim_messages_to_cap(messages, self.max_messages)
+            if trimmed is not messages:
+                checkpoint = {**checkpoint, "channel_values": {**channel_values, "messages": trimmed}}
+            message_count = len(trimmed)
+        else:
+            message_count = 0
+
+        type_, blob = self._dump(checkpoint)
+        metadata_type, metadata_blob = self._dump(metadata)
+        row = (checkpoint["id"], parent_id, type_, blob, metadata_type, metadata_blob)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                    "type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, *row),
+                )
+                self._prune_checkpoints(thread_id, checkpoint_ns)
+                # message count is tracked for the root graph; subgraph checkpoints only refresh recency
+                self._touch(thread_id, message_count if checkpoint_ns == "" else None, write=True)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._cache_put((thread_id, checkpoint_ns), {"row": row, "writes": {}})
+            self._maybe_sweep()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts, ...) overwrite; regular writes are first-wins.
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        rows = []
+        for i, (channel, value) in enumerate(writes):
+            type_, blob = self._dump(value)
+            rows.append((task_id, WRITES_IDX_MAP.get(channel, i), channel, type_, blob))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO writes "
+                    "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(thread_id, checkpoint_ns, checkpoint_id, *row, task_path) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            entry = self._hot.get((thread_id, checkpoint_ns))
+            if entry is not None and entry["row"][0] == checkpoint_id:
+                for row in rows:
+                    if replace or (row[0], row[1]) not in entry["writes"]:
+                        entry["writes"][(row[0], row[1])] = row
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._delete_threads([str(thread_id)])
+            self._conn.execute("COMMIT")
+
+    # ---- Async API (the sync implementation, off the event loop) ----
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in results:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.get_running_loop().run_in_executor(None, self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.delete_thread, thread_id)
+
+    # ---- Introspection ----
+    def usage(self) -> List[dict]:
+        """Per-thread message count, stored checkpoints, disk bytes and hot-cache memory bytes."""
+        with self._lock:
+            memory: Dict[str, int] = {}
+            for (thread_id, _), entry in self._hot.items():
+                size = sum(len(part) for part in entry["row"][2:] if part)
+                size += sum(len(w[4] or b"") for w in entry["writes"].values())
+                memory[thread_id] = memory.get(thread_id, 0) + size
+            rows = self._conn.execute(
+                "SELECT t.thread_id, t.last_access, t.message_count, "
+                " (SELECT COUNT(*) FROM checkpoints c WHERE c.thread_id = t.thread_id), "
+                " (SELECT COALESCE(SUM(LENGTH(c.checkpoint) + LENGTH(c.metadata)), 0) FROM checkpoints c WHERE c.thread_id = t.thread_id), "
+                " (SELECT COALESCE(SUM(LENGTH(w.value)), 0) FROM writes w WHERE w.thread_id = t.thread_id) "
+                "FROM threads t ORDER BY t.last_access DESC"
+            ).fetchall()
+        return [
+            {
+                "thread_id": thread_id,
+                "last_access": last_access,
+                "messages": message_count,
+                "checkpoints": checkpoints,
+                "disk_bytes": checkpoint_bytes + write_bytes,
+                "memory_bytes": memory.get(thread_id, 0),
+            }
+            for thread_id, last_access, message_count, checkpoints, checkpoint_bytes, write_bytes in rows
+        ]
+
+
+_saver = None
+_saver_lock = threading.Lock()
+
+
+def get_checkpointer() -> BoundedSqliteSaver:
+    """Process-wide checkpointer shared by the support and human agents."""
+    global _saver
+    with _saver_lock:
+        if _saver is None:
+            _saver = BoundedSqliteSaver()
+        return _saver
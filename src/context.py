@@ -0,0 +1,137 @@
+"""
+Context management in front of the agent's model call.
+
+Used as the `pre_model_hook` of create_react_agent: the checkpointed thread
+keeps its history, but each LLM call only sees
+
+  - a rolling summary of turns that fell out of the window,
+  - the most recent turns that fit `window_tokens` (starting on a user message),
+  - tool outputs truncated to `tool_output_tokens` each.
+
+Token counts are approximate (langchain_core's character-based counter) and
+are logged per call so the savings are visible.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a customer support conversation. "
+    "Merge the previous summary with the new messages into one concise summary (at most {max_words} words). "
+    "Keep every user name, ticket ID, ticket field, decision and open request; drop greetings and small talk. "
+    "Return only the summary."
+)
+
+
+class ConversationContext:
+    """Sliding window + rolling summary + tool-output truncation, with token budgets."""
+
+    def __init__(self, summarizer=None, window_tokens: int = 2000, summary_tokens: int = 300,
+                 tool_output_tokens: int = 400, system_prompt: str = "", max_threads: int = 1024):
+        self.summarizer = summarizer
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.tool_output_tokens = tool_output_tokens
+        self.prompt_tokens = count_tokens_approximately([SystemMessage(content=system_prompt)]) if system_prompt else 0
+        self.max_threads = max_threads
+        # thread_id -> (id of the last message folded into the summary, summary text)
+        self._summaries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- Stages ----
+    def truncate_tool_output(self, message: BaseMessage) -> BaseMessage:
+        if not isinstance(message, ToolMessage) or not isinstance(message.content, str):
+            return message
+        max_chars = self.tool_output_tokens * 4  # ~4 characters per token
+        if len(message.content) <= max_chars:
+            return message
+        return message.model_copy(update={"content": message.content[:max_chars] + " … [truncated]"})
+
+    def window(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        recent = trim_messages(
+            messages,
+            max_tokens=self.window_tokens,
+            strategy="last",
+            token_counter=count_tokens_approximately,
+            start_on="human",
+            include_system=False,
+            allow_partial=False,
+        )
+        if recent:
+            return recent
+        # Latest turn alone is over budget: still send it whole from its user message.
+        for i in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[i], HumanMessage):
+                return messages[i:]
+        return messages
+
+    def summarize(self, thread_id: Optional[str], dropped: List[BaseMessage]) -> Optional[str]:
+        """Fold messages that left the window into the thread's rolling summary (only new ones are sent)."""
+        if not dropped or self.summarizer is None:
+            return None
+        with self._lock:
+            upto_id, summary = self._summaries.get(thread_id, (None, None))
+        if upto_id is not None and upto_id == dropped[-1].id:
+            return summary
+
+        new = dropped
+        if upto_id is not None:
+            ids = [m.id for m in dropped]
+            if upto_id in ids:
+                new = dropped[ids.index(upto_id) + 1:]
+
+        transcript = "\n".join(_transcript_line(m) for m in new)
+        request = f"Previous summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+        try:
+            response = self.summarizer.invoke([
+                SystemMessage(content=SUMMARY_PROMPT.format(max_words=int(self.summary_tokens * 0.75))),
+                HumanMessage(content=request),
+            ])
+            summary = str(response.content).strip()
+        except Exception as e:
+            logger.warning("Conversation summary failed, keeping the previous one: %s", e)
+            return summary
+
+        with self._lock:
+            self._summaries[thread_id] = (dropped[-1].id, summary)
+            self._summaries.move_to_end(thread_id)
+            while len(self._summaries) > self.max_threads:
+                self._summaries.popitem(last=False)
+        return summary
+
+    # ---- pre_model_hook ----
+    def __call__(self, state, config=None):
+        messages = state["messages"]
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+
+        truncated = [self.truncate_tool_output(m) for m in messages]
+        recent = self.window(truncated)
+        dropped = truncated[:len(truncated) - len(recent)]
+        summary = self.summarize(thread_id, dropped)
+
+        llm_input = list(recent)
+        if summary:
+            llm_input.insert(0, SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+
+        full_tokens = self.prompt_tokens + count_tokens_approximately(messages)
+        sent_tokens = self.prompt_tokens + count_tokens_approximately(llm_input)
+        logger.info(
+            "prompt tokens thread=%s history=%d msgs/%d tok sent=%d msgs/%d tok (summary=%s, saved %d tok)",
+            thread_id, len(messages), full_tokens, len(llm_input), sent_tokens, bool(summary), full_tokens - sent_tokens,
+        )
+        return {"llm_input_messages": llm_input}
+
+
+def _transcript_line(message: BaseMessage) -> str:
+    role = {"human": "User", "ai": "Assistant", "tool": "Tool"}.get(message.type, message.type)
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if message.type == "ai" and getattr(message, "tool_calls", None):
+        calls = ", ".join(f"{c['name']}({c['args']})" for c in message.tool_calls)
+        content = f"{content} [called {calls}]".strip()
+    return f"{role}: {content[:1000]}"
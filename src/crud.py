@@ -1,17 +1,25 @@
-from typing import Optional, List
+import base64
+import json
+import re
+import uuid
+from typing import Optional, List, Tuple
 from contextlib import contextmanager
 from datetime import datetime
 
 from langchain_core.tools import tool
-from sqlalchemy import or_
+from sqlalchemy import delete, func, insert, or_, select, text, tuple_, update
+from sqlalchemy.exc import OperationalError
 
 from src.models import Ticket, TicketStatus, PriorityLevel
-from src.db import SessionLocal  # keep your existing SessionLocal
+from src.db import SessionLocal, init_db  # keep your existing SessionLocal
+from src.migrations import (RESOLUTION_BUCKET_HOURS, TICKET_COUNTERS_SELECT, TICKET_RESOLUTION_SELECT,
+                            has_ticket_fts, has_ticket_stats)
 
 # ---- Helpers ----
 @contextmanager
 def get_session():
     """Context manager for sessions with commit/rollback behavior."""
+    init_db(SessionLocal.kw["bind"])  # no-op after the first call per engine
     session = SessionLocal()
     try:
         yield session
@@ -49,6 +57,211 @@ def _format_ticket_list(tickets: List[Ticket]) -> str:
     return "\n".join(lines)
 
 
+# ---- Keyset pagination ----
+def encode_page_token(ticket: Ticket) -> str:
+    """Opaque cursor pointing just after `ticket` in (created_at desc, id desc) order."""
+    payload = {"c": ticket.created_at.isoformat() if ticket.created_at else None, "i": ticket.id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_page_token(token: str) -> Tuple[Optional[datetime], str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        created_at = datetime.fromisoformat(payload["c"]) if payload.get("c") else None
+        return created_at, str(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid page token") from e
+
+
+def list_tickets_page(session, user: Optional[str] = None, status: Optional[str] = None, assigned_to: Optional[str] = None,
+                      page_size: int = 50, page_token: Optional[str] = None) -> Tuple[List[Ticket], Optional[str]]:
+    """
+    One page of tickets, most recent first, plus the token for the next page
+    (None on the last page). Each page seeks past the previous page's last
+    (created_at, id) instead of using OFFSET, so page N costs the same as page 1.
+    """
+    page_size = max(1, int(page_size))
+    query = session.query(Ticket)
+    if user is not None:
+        query = query.filter(Ticket.user == user)
+    if status is not None:
+        query = query.filter(Ticket.status == _parse_enum_member(TicketStatus, status))
+    if assigned_to is not None:
+        query = query.filter(Ticket.assigned_to == assigned_to)
+    # Rows with a created_at come first, then the NULLs (they sort last descending).
+    # Each part is read as one range of the (user, created_at, id) index: a row
+    # value comparison seeks, while an OR of column predicates would scan and sort.
+    dated = query.filter(Ticket.created_at.is_not(None))
+    undated = query.filter(Ticket.created_at.is_(None))
+    if page_token:
+        created_at, ticket_id = decode_page_token(page_token)
+        if created_at is None:
+            dated = None
+            undated = undated.filter(Ticket.id < ticket_id)
+        else:
+            dated = dated.filter(tuple_(Ticket.created_at, Ticket.id) < tuple_(created_at, ticket_id))
+    rows = []
+    if dated is not None:
+        rows = dated.order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(page_size + 1).all()
+    if len(rows) <= page_size:
+        rows += undated.order_by(Ticket.id.desc()).limit(page_size + 1 - len(rows)).all()
+    next_token = encode_page_token(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_token
+
+
+# ---- Ticket search ----
+_fts_available = {}
+
+
+def _fts_enabled(session) -> bool:
+    """Whether the bound database has the tickets_fts index (cached per engine)."""
+    engine = session.get_bind()
+    if engine not in _fts_available:
+        _fts_available[engine] = engine.dialect.name == "sqlite" and has_ticket_fts(session.connection())
+    return _fts_available[engine]
+
+
+def build_fts_query(query: str, operator: str = "AND") -> Optional[str]:
+    """
+    Translate a user search string into an FTS5 MATCH expression:
+      - "double quoted text" -> phrase query
+      - word*                -> prefix query
+      - other words          -> terms joined with `operator`
+    Everything is quoted, so FTS5 syntax characters in user input are inert.
+    """
+    parts = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query):
+        if phrase:
+            tokens = re.findall(r"\w+", phrase)
+            if tokens:
+                parts.append('"' + " ".join(tokens) + '"')
+            continue
+        tokens = re.findall(r"\w+", word)
+        parts.extend(f'"{token}"' for token in tokens)
+        if tokens and word.endswith("*"):
+            parts[-1] += "*"
+    if not parts:
+        return None
+    return f" {operator} ".join(parts)
+
+
+def _search_fts(session, query: str, limit: int) -> List[Ticket]:
+    """bm25-ranked FTS5 search (subject weighted over description). All terms first, then any term."""
+    statement = text(
+        "SELECT tickets.* FROM tickets_fts JOIN tickets ON tickets.rowid = tickets_fts.rowid "
+        "WHERE tickets_fts MATCH :match ORDER BY bm25(tickets_fts, 2.0, 1.0) LIMIT :limit"
+    )
+    match_all = build_fts_query(query, "AND")
+    if match_all is None:
+        return []
+    results = session.query(Ticket).from_statement(statement).params(match=match_all, limit=int(limit)).all()
+    match_any = build_fts_query(query, "OR")
+    if not results and match_any != match_all:
+        results = session.query(Ticket).from_statement(statement).params(match=match_any, limit=int(limit)).all()
+    return results
+
+
+def _search_like(session, query: str, limit: int) -> List[Ticket]:
+    """Substring scan; used when FTS5 is unavailable."""
+    return (
+        session.query(Ticket)
+        .filter(or_(Ticket.subject.ilike(f"%{query}%"), Ticket.description.ilike(f"%{query}%")))
+        .order_by(Ticket.created_at.desc())
+        .limit(int(limit))
+        .all()
+    )
+
+
+def search_ticket_rows(session, query: str, limit: int = 50) -> List[Ticket]:
+    """Full-text search when the FTS index is available, substring match otherwise."""
+    results = None
+    if _fts_enabled(session):
+        try:
+            results = _search_fts(session, query, limit)
+        except OperationalError:
+            session.rollback()
+            results = None
+    if results is None:
+        results = _search_like(session, query.replace("*", "").replace('"', ""), limit)
+    return results
+
+
+# ---- Ticket statistics ----
+# Served from the trigger-maintained ticket_counters / ticket_resolution_buckets
+# tables (see src.migrations): a fixed number of small reads at any table size.
+_ACTIVE_STATUSES = (TicketStatus.open.name, TicketStatus.in_progress.name)
+
+
+def _enum_label(enum_class, name: str) -> str:
+    member = enum_class.__members__.get(name)
+    return member.value if member is not None else name
+
+
+def _resolution_percentile(buckets: List[Tuple[int, int, float]], q: float) -> Optional[float]:
+    """Percentile in hours, interpolated inside the bucket it falls in (the open-ended last bucket uses its mean)."""
+    total = sum(count for _, count, _ in buckets)
+    if not total:
+        return None
+    target, seen = q * total, 0
+    for bucket, count, seconds in buckets:
+        if seen + count >= target:
+            if bucket >= len(RESOLUTION_BUCKET_HOURS):
+                return seconds / count / 3600
+            low = RESOLUTION_BUCKET_HOURS[bucket - 1] if bucket else 0.0
+            high = RESOLUTION_BUCKET_HOURS[bucket]
+            return low + (high - low) * (target - seen) / count
+        seen += count
+    return None
+
+
+def ticket_stats(session) -> dict:
+    """
+    Ticket counts by status, priority, category and assignee, open/in-progress
+    backlog per assignee, and resolution-time (created_at -> closed_at)
+    mean and percentiles in hours. Percentiles are estimated from histogram buckets.
+    """
+    precomputed = has_ticket_stats(session.connection())
+    counters_sql = "SELECT dimension, value, count FROM ticket_counters WHERE count != 0" if precomputed else TICKET_COUNTERS_SELECT
+    resolution_sql = ("SELECT bucket, count, total_seconds FROM ticket_resolution_buckets WHERE count > 0"
+                      if precomputed else TICKET_RESOLUTION_SELECT)
+
+    stats = {"total": 0, "by_status": {}, "by_priority": {}, "by_category": {}, "by_assignee": {},
+             "by_status_priority": {}, "backlog_by_assignee": {}}
+    for dimension, value, count in session.execute(text(counters_sql)):
+        if dimension == "total":
+            stats["total"] = count
+        elif dimension == "status":
+            stats["by_status"][_enum_label(TicketStatus, value)] = count
+        elif dimension == "priority":
+            stats["by_priority"][_enum_label(PriorityLevel, value)] = count
+        elif dimension == "category":
+            stats["by_category"][value or "(none)"] = count
+        elif dimension == "assignee":
+            stats["by_assignee"][value or "(unassigned)"] = count
+        elif dimension == "status_priority":
+            status, priority = value.split(":", 1)
+            stats["by_status_priority"][f"{_enum_label(TicketStatus, status)}/{_enum_label(PriorityLevel, priority)}"] = count
+        elif dimension == "assignee_status":
+            assignee, status = value.rsplit(":", 1)
+            if status in _ACTIVE_STATUSES:
+                key = assignee or "(unassigned)"
+                stats["backlog_by_assignee"][key] = stats["backlog_by_assignee"].get(key, 0) + count
+
+    buckets = sorted((int(b), int(c), float(t or 0.0)) for b, c, t in session.execute(text(resolution_sql)))
+    closed = sum(count for _, count, _ in buckets)
+    stats["resolution_hours"] = {
+        "count": closed,
+        "mean": sum(seconds for _, _, seconds in buckets) / closed / 3600 if closed else None,
+        "p50": _resolution_percentile(buckets, 0.5),
+        "p90": _resolution_percentile(buckets, 0.9),
+        "p99": _resolution_percentile(buckets, 0.99),
+        "buckets": {(f"<={RESOLUTION_BUCKET_HOURS[b]}h" if b < len(RESOLUTION_BUCKET_HOURS) else f">{RESOLUTION_BUCKET_HOURS[-1]}h"): c
+                    for b, c, _ in buckets},
+    }
+    return stats
+
+
 # ---- Tools (LangChain tool-wrapped functions) ----
 @tool
 def create_ticket(user: str, subject: str, description: str, priority: Optional[str] = "medium", category: Optional[str] = None) -> str:
@@ -144,38 +357,230 @@ def check_ticket(ticket_id: str) -> str:
 
 
 @tool
-def list_tickets(user: str, limit: int = 50) -> str:
-    """List tickets for a user (most recent first)."""
+def list_tickets(user: str, limit: int = 50, page_token: Optional[str] = None) -> str:
+    """List tickets for a user (most recent first), `limit` per page. Pass the returned page token to get the next page."""
     with get_session() as session:
-        tickets = session.query(Ticket).filter_by(user=user).order_by(Ticket.created_at.desc()).limit(int(limit)).all()
+        try:
+            tickets, next_token = list_tickets_page(session, user=user, page_size=limit, page_token=page_token)
+        except ValueError as e:
+            return f"❌ {e}"
         if not tickets:
             return f"No tickets found for user {user}."
-        return _format_ticket_list(tickets)
+        result = _format_ticket_list(tickets)
+        if next_token:
+            result += f"\nMore tickets available. Next page token: {next_token}"
+        return result
 
 
 @tool
 def search_tickets(query: str, limit: int = 50) -> str:
-    """Search subject and description (case-insensitive)."""
+    """Search subject and description (case-insensitive). Supports "exact phrases" and prefix* terms."""
     q = str(query).strip()
     if not q:
         return "❌ Please provide a search query."
 
     with get_session() as session:
-        results = (
-            session.query(Ticket)
-            .filter(or_(Ticket.subject.ilike(f"%{q}%"), Ticket.description.ilike(f"%{q}%")))
-            .order_by(Ticket.created_at.desc())
-            .limit(int(limit))
-            .all()
-        )
+        results = search_ticket_rows(session, q, limit)
         if not results:
             return "No tickets matched your query."
         return _format_ticket_list(results)
 
 
+@tool
+def ticket_statistics() -> str:
+    """Aggregate ticket statistics: counts by status, priority, category and assignee, open backlog per assignee, and time to close."""
+    with get_session() as session:
+        stats = ticket_stats(session)
+    if not stats["total"]:
+        return "No tickets yet."
+
+    def fmt(counts: dict) -> str:
+        return ", ".join(f"{k}: {v}" for k, v in sorted(counts.items(), key=lambda kv: -kv[1])) or "—"
+
+    lines = [
+        f"📊 Total tickets: {stats['total']}",
+        f"By status: {fmt(stats['by_status'])}",
+        f"By priority: {fmt(stats['by_priority'])}",
+        f"Open/in-progress by priority: {fmt({k: v for k, v in stats['by_status_priority'].items() if k.split('/')[0] in ('Open', 'In Progress')})}",
+        f"By category: {fmt(stats['by_category'])}",
+        f"Backlog per assignee: {fmt(stats['backlog_by_assignee'])}",
+    ]
+    resolution = stats["resolution_hours"]
+    if resolution["count"]:
+        lines.append(
+            f"Time to close ({resolution['count']} closed): mean {resolution['mean']:.1f}h, "
+            f"median {resolution['p50']:.1f}h, p90 {resolution['p90']:.1f}h"
+        )
+    return "\n".join(lines)
+
+
 @tool
 def get_current_datetime() -> str:
     """Returns the current server date/time in a human-friendly format."""
     now = datetime.now()
     # e.g. 🕒 Sunday, 21 September 2025, 03:15 PM
     return now.strftime("🕒 %A, %d %B %Y, %I:%M %p")
+
+
+# ---- Bulk operations (batch jobs; not exposed to the agent) ----
+# Each chunk is one transaction executed as a single Core statement
+# (executemany for inserts), so N tickets cost N / chunk_size commits.
+BULK_CHUNK_SIZE = 500
+BULK_FILTER_FIELDS = ("user", "status", "priority", "assigned_to", "category", "created_before", "created_after")
+
+
+def _chunks(items: list, size: int):
+    size = max(1, int(size))
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _bulk_filter_clauses(filters: dict) -> list:
+    unknown = set(filters) - set(BULK_FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown filter field(s): {', '.join(sorted(unknown))}")
+    clauses = []
+    for field, value in filters.items():
+        if field == "status":
+            clauses.append(Ticket.status == _parse_enum_member(TicketStatus, value))
+        elif field == "priority":
+            clauses.append(Ticket.priority == _parse_enum_member(PriorityLevel, value))
+        elif field == "created_before":
+            clauses.append(Ticket.created_at < value)
+        elif field == "created_after":
+            clauses.append(Ticket.created_at >= value)
+        else:
+            clauses.append(getattr(Ticket, field) == value)
+    return clauses
+
+
+def _bulk_target_ids(ticket_ids: Optional[List[str]], filters: Optional[dict], chunk_size: int):
+    """
+    Yield chunks of target ids: the given ids as-is, or ids matching `filters`
+    read in id order one chunk at a time (keyset, so the scan stays cheap
+    even while the rows are being modified).
+    """
+    if ticket_ids is not None:
+        yield from _chunks([str(i) for i in ticket_ids], chunk_size)
+        return
+    if not filters:
+        raise ValueError("Provide ticket_ids or at least one filter.")
+    clauses = _bulk_filter_clauses(filters)
+    last_id = ""
+    while True:
+        with get_session() as session:
+            chunk = [row[0] for row in session.execute(
+                select(Ticket.id).where(*clauses, Ticket.id > last_id).order_by(Ticket.id).limit(int(chunk_size))
+            )]
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def bulk_create_tickets(specs: List[dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[dict]:
+    """
+    Insert many tickets. `specs` are dicts with the create_ticket fields
+    (user, subject, description, optional priority / category). Returns one
+    result per spec, in order: {"index", "ok", "id"} or {"index", "ok": False, "error"}.
+    """
+    results: List[Optional[dict]] = [None] * len(specs)
+    rows = []
+    now = datetime.utcnow()
+    for index, spec in enumerate(specs):
+        user, subject, description = (str(spec.get(k) or "").strip() for k in ("user", "subject", "description"))
+        if not (user and subject and description):
+            results[index] = {"index": index, "ok": False, "error": "Missing required fields: 'user', 'subject', and 'description' are required."}
+            continue
+        try:
+            priority = _parse_enum_member(PriorityLevel, spec.get("priority") or "medium")
+        except ValueError:
+            priority = PriorityLevel.medium
+        category = spec.get("category")
+        rows.append((index, {
+            "id": str(uuid.uuid4()),
+            "user": user,
+            "subject": subject,
+            "description": description,
+            "priority": priority,
+            "status": TicketStatus.open,
+            "category": category.strip() if category else None,
+            "created_at": now,
+            "updated_at": now,
+        }))
+
+    for chunk in _chunks(rows, chunk_size):
+        try:
+            with get_session() as session:
+                session.execute(insert(Ticket.__table__), [row for _, row in chunk])
+        except Exception as e:
+            for index, _ in chunk:
+                results[index] = {"index": index, "ok": False, "error": str(e)}
+            continue
+        for index, row in chunk:
+            results[index] = {"index": index, "ok": True, "id": row["id"]}
+    return results
+
+
+def bulk_update_tickets(ticket_ids: Optional[List[str]] = None, filters: Optional[dict] = None, status: Optional[str] = None,
+                        priority: Optional[str] = None, assigned_to: Optional[str] = None,
+                        chunk_size: int = BULK_CHUNK_SIZE) -> List[dict]:
+    """
+    Apply the same status / priority / assigned_to change to many tickets,
+    chosen by `ticket_ids` or by `filters` (keys: BULK_FILTER_FIELDS), e.g.
+    bulk_update_tickets(filters={"status": "resolved"}, status="closed").
+    closed_at is maintained as in update_ticket. Returns {"id", "ok"[, "error"]} per ticket.
+    """
+    values = {}
+    if status is not None:
+        status_member = _parse_enum_member(TicketStatus, status)
+        values["status"] = status_member
+        if status_member == TicketStatus.closed:
+            values["closed_at"] = func.coalesce(Ticket.__table__.c.closed_at, datetime.utcnow())
+        else:
+            values["closed_at"] = None
+    if priority is not None:
+        values["priority"] = _parse_enum_member(PriorityLevel, priority)
+    if assigned_to is not None:
+        values["assigned_to"] = assigned_to.strip() or None
+    if not values:
+        raise ValueError("Nothing to update. Provide at least one of status, assigned_to, priority.")
+    values["updated_at"] = datetime.utcnow()
+
+    table = Ticket.__table__
+    results = []
+    for chunk in _bulk_target_ids(ticket_ids, filters, chunk_size):
+        try:
+            with get_session() as session:
+                found = {row[0] for row in session.execute(select(table.c.id).where(table.c.id.in_(chunk)))}
+                if found:
+                    session.execute(update(table).where(table.c.id.in_(found)).values(**values))
+        except Exception as e:
+            results.extend({"id": ticket_id, "ok": False, "error": str(e)} for ticket_id in chunk)
+            continue
+        results.extend(
+            {"id": ticket_id, "ok": True} if ticket_id in found else {"id": ticket_id, "ok": False, "error": "Ticket not found."}
+            for ticket_id in chunk
+        )
+    return results
+
+
+def bulk_delete_tickets(ticket_ids: Optional[List[str]] = None, filters: Optional[dict] = None,
+                        chunk_size: int = BULK_CHUNK_SIZE) -> List[dict]:
+    """Delete many tickets chosen by `ticket_ids` or `filters`. Returns {"id", "ok"[, "error"]} per ticket."""
+    table = Ticket.__table__
+    results = []
+    for chunk in _bulk_target_ids(ticket_ids, filters, chunk_size):
+        try:
+            with get_session() as session:
+                found = {row[0] for row in session.execute(select(table.c.id).where(table.c.id.in_(chunk)))}
+                if found:
+                    session.execute(delete(table).where(table.c.id.in_(found)))
+        except Exception as e:
+            results.extend({"id": ticket_id, "ok": False, "error": str(e)} for ticket_id in chunk)
+            continue
+        results.extend(
+            {"id": ticket_id, "ok": True} if ticket_id in found else {"id": ticket_id, "ok": False, "error": "Ticket not found."}
+            for ticket_id in chunk
+        )
+    return results
@@ -1,7 +1,16 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from sqlalchemy import create_engine
+from typing import Optional
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from src.models import Base
+from src.migrations import run_migrations
+from src.telemetry import instrument_engine
 
 # Ensure database file lives in ./data/tickets.db
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -11,13 +20,96 @@ DATA_DIR.mkdir(exist_ok=True)
 DB_PATH = DATA_DIR / "tickets.db"
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    future=True,
-)
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """SQLite pragmas applied to every new connection, plus connection-pool sizing. None = SQLite default."""
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = None
+    mmap_size: Optional[int] = None  # bytes
+    cache_size: Optional[int] = None  # pages, or KiB when negative
+    busy_timeout_ms: Optional[int] = None
+    temp_store: Optional[str] = None
+    pool_size: Optional[int] = None  # None = SQLAlchemy's default pool
+    max_overflow: int = 0
+    pool_timeout: float = 30.0
+
+
+ENGINE_PROFILES = {
+    # What the app ran with originally: rollback journal, default pool.
+    "legacy": EngineProfile(),
+    # WAL lets readers run alongside the single writer; NORMAL sync is durable
+    # across app crashes in WAL mode and skips an fsync per commit.
+    "wal": EngineProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        mmap_size=256 * 1024 * 1024,
+        cache_size=-64 * 1024,
+        busy_timeout_ms=5000,
+        temp_store="MEMORY",
+        pool_size=8,
+        max_overflow=8,
+    ),
+}
+DB_PROFILE = os.getenv("TICKETS_DB_PROFILE", "wal")
+
+
+def make_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    """Create an engine for `url` configured by the named ENGINE_PROFILES entry."""
+    settings = ENGINE_PROFILES[profile]
+    connect_args = {"check_same_thread": False}
+    if settings.busy_timeout_ms is not None:
+        connect_args["timeout"] = settings.busy_timeout_ms / 1000
+    pool_args = {}
+    if settings.pool_size is not None:
+        pool_args = dict(poolclass=QueuePool, pool_size=settings.pool_size,
+                         max_overflow=settings.max_overflow, pool_timeout=settings.pool_timeout)
+
+    new_engine = create_engine(url, connect_args=connect_args, future=True, **pool_args)
+
+    pragmas = [
+        ("journal_mode", settings.journal_mode),
+        ("synchronous", settings.synchronous),
+        ("mmap_size", settings.mmap_size),
+        ("cache_size", settings.cache_size),
+        ("busy_timeout", settings.busy_timeout_ms),
+        ("temp_store", settings.temp_store),
+    ]
+    pragmas = [(name, value) for name, value in pragmas if value is not None]
+
+    if pragmas:
+        @event.listens_for(new_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return instrument_engine(new_engine)
+
+
+engine = make_engine()  # lazy: no connection is opened until first use
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
-# Auto-create tables if missing
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def init_db(target_engine=None) -> float:
+    """
+    Create missing tables and bring an older database up to date, once per
+    engine per process (called at startup and, as a fallback, by
+    crud.get_session). Returns the seconds spent, 0.0 if already done.
+    """
+    target_engine = target_engine or engine
+    if target_engine in _initialized:
+        return 0.0
+    with _init_lock:
+        if target_engine in _initialized:
+            return 0.0
+        start = time.perf_counter()
+        Base.metadata.create_all(bind=target_engine)
+        run_migrations(target_engine)
+        _initialized.add(target_engine)
+        return time.perf_counter() - start
@@ -0,0 +1,215 @@
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text: str) -> str:
+    """
+    Canonical cache key for a query: case-folded, whitespace collapsed and
+    trailing punctuation stripped ("How do I reset my password?" ==
+    "how do i  reset my password").
+    """
+    text = re.sub(r"\s+", " ", str(text)).strip().casefold()
+    return text.rstrip("?!.。 ")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings instance and caches query embeddings.
+
+      - In memory: bounded LRU keyed on the normalized query.
+      - On disk (optional): SQLite table of float32 vectors, so a restarted
+        process can skip re-embedding hot queries.
+
+    Only query embeddings (`embed_query` / `embed_queries`) are cached, and
+    misses always go through the model's `embed_query` (models may encode
+    queries and documents differently). `embed_documents` (index builds) is
+    passed straight through to the wrapped model.
+
+    The disk store has its own lock and runs in WAL mode with
+    synchronous=NORMAL: memory hits never wait on SQLite, and recency updates
+    are buffered and committed together with the next write.
+    """
+
+    # Recency updates buffered before they are committed on their own.
+    TOUCH_FLUSH_EVERY = 64
+
+    def __init__(self, embeddings: Embeddings, model_name: str, max_entries: int = 2048,
+                 disk_path: Optional[str] = None, disk_max_entries: int = 100_000, preload: int = 512):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        # Disk rows record which method produced them; only embed_query vectors are stored.
+        self._disk_model = f"{model_name}#query"
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._disk_writes = 0
+
+        self._conn = None
+        self._disk_lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_query_embeddings_last_used ON query_embeddings (model, last_used)")
+            self._conn.commit()
+            if preload:
+                self._preload(min(preload, max_entries))
+
+    # ---- Disk helpers (take self._disk_lock, never self._lock) ----
+    @staticmethod
+    def _to_blob(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _from_blob(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _preload(self, n: int):
+        with self._disk_lock:
+            rows = self._conn.execute(
+                "SELECT key, vector FROM query_embeddings WHERE model = ? ORDER BY last_used DESC LIMIT ?",
+                (self._disk_model, n),
+            ).fetchall()
+        with self._lock:
+            # oldest first so the most recently used end up at the MRU end
+            for key, blob in reversed(rows):
+                self._memory[key] = self._from_blob(blob)
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        with self._disk_lock:
+            row = self._conn.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND key = ?", (self._disk_model, key)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.TOUCH_FLUSH_EVERY:
+                self._flush_locked()
+        return self._from_blob(row[0])
+
+    def _disk_put(self, items: List[Tuple[str, List[float]]]):
+        """Store new vectors and any buffered recency updates in one commit."""
+        now = time.time()
+        with self._disk_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO query_embeddings (model, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(self._disk_model, key, self._to_blob(vector), now) for key, vector in items],
+            )
+            previous, self._disk_writes = self._disk_writes, self._disk_writes + len(items)
+            # Trim the on-disk store now and then instead of on every write.
+            if previous // 500 != self._disk_writes // 500:
+                self._conn.execute(
+                    "DELETE FROM query_embeddings WHERE model = ? AND key NOT IN ("
+                    " SELECT key FROM query_embeddings WHERE model = ? ORDER BY last_used DESC LIMIT ?)",
+                    (self._disk_model, self._disk_model, self.disk_max_entries),
+                )
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE query_embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                [(used, self._disk_model, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+        self._conn.commit()
+
+    # ---- Embeddings interface ----
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Cached `embed_query` for many texts; SQLite and the model are only used for memory misses."""
+        keys = [normalize_query(text) for text in texts]
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    vectors[i] = list(vector)
+                elif key in missing:
+                    self._hits += 1  # duplicate within the batch
+                    missing[key].append(i)
+                else:
+                    missing[key] = [i]
+
+        found = {}
+        if missing and self._conn is not None:
+            found = {key: vector for key in missing if (vector := self._disk_get(key)) is not None}
+        # Embed outside the lock so concurrent misses do not serialize on the model.
+        embedded = [(key, self.embeddings.embed_query(texts[positions[0]]))
+                    for key, positions in missing.items() if key not in found]
+
+        with self._lock:
+            self._disk_hits += len(found)
+            self._misses += len(embedded)
+            for key, vector in [*found.items(), *embedded]:
+                self._remember(key, vector)
+                for i in missing[key]:
+                    vectors[i] = list(vector)
+        if embedded and self._conn is not None:
+            self._disk_put(embedded)
+        return vectors
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = list(vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ---- Introspection ----
+    def stats(self) -> dict:
+        """Hit / miss counters for the query cache."""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            snapshot = {
+                "memory_hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": (self._hits + self._disk_hits) / lookups if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_max_entries": self.max_entries,
+                "disk_entries": None,
+            }
+        if self._conn is not None:
+            with self._disk_lock:
+                snapshot["disk_entries"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM query_embeddings WHERE model = ?", (self._disk_model,)
+                ).fetchone()[0]
+        return snapshot
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._memory.clear()
+        if disk and self._conn is not None:
+            with self._disk_lock:
+                self._touched.clear()
+                self._conn.execute("DELETE FROM query_embeddings WHERE model = ?", (self._disk_model,))
+                self._conn.commit()
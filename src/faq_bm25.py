@@ -0,0 +1,144 @@
+"""
+In-process BM25 index over the FAQ documents.
+
+Runs next to the FAISS search: exact error codes / product names that the
+embedding model handles poorly are matched lexically, and the two rankings
+are merged with reciprocal rank fusion.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from src.faq_rows import faq_fields
+
+# Words that carry no signal in support questions.
+STOPWORDS = frozenset("""
+a an and are as at be but by can could do does for from has have how i if in is it its me my
+no not of on or our please so that the their them there this to was we what when where which
+who why will with would you your
+""".split())
+
+# Compound tokens such as "err-1042", "v2.3", "sku_991" are kept whole (and also split).
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(str(text).casefold()):
+        parts = re.split(r"[-_.]", token)
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(p for p in parts if p and p not in STOPWORDS)
+    return tokens
+
+
+def is_code_token(token: str) -> bool:
+    """Error codes / SKUs / versions: letters and digits mixed, or a compound token with a digit."""
+    has_digit = any(c.isdigit() for c in token)
+    has_alpha = any(c.isalpha() for c in token)
+    return has_digit and (has_alpha or bool(re.search(r"[-_.]", token)))
+
+
+def document_text(doc: Document) -> str:
+    question = doc.metadata.get("FAQ") or ""
+    return f"{question}\n{doc.page_content}"
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index (term -> [(doc position, term frequency)])."""
+
+    def __init__(self, ids: Sequence[str], docs: Sequence[Document], k1: float = 1.5, b: float = 0.75):
+        self.ids = list(ids)
+        self.docs = list(docs)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        self._questions: Dict[str, int] = {}
+
+        for position, doc in enumerate(self.docs):
+            tokens = tokenize(document_text(doc))
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((position, tf))
+            question = _normalize(faq_fields(doc).question)  # the question cell, not the whole row
+            if question:
+                self._questions.setdefault(question, position)
+
+        n = len(self.docs)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    @classmethod
+    def from_vector_store(cls, vector_store, **kwargs) -> "BM25Index":
+        """Index exactly the documents held by a LangChain FAISS store."""
+        ids, docs = [], []
+        for doc_id in vector_store.index_to_docstore_id.values():
+            doc = vector_store.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                ids.append(doc_id)
+                docs.append(doc)
+        return cls(ids, docs, **kwargs)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float, float]]:
+        """
+        Top-k (Document, bm25 score, query-term coverage) triples. Coverage is
+        the fraction of distinct query terms the document contains.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / (self.avg_length or 1.0))
+                scores[position] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[position] += 1
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.docs[p], score, matched[p] / len(terms)) for p, score in ranked]
+
+    def exact_match(self, query: str) -> Optional[Document]:
+        """
+        Fast-path lookup that needs no embedding: the query is an FAQ question
+        verbatim, or it names a code-like token (error code, SKU, version)
+        that appears in exactly one document.
+        """
+        position = self._questions.get(_normalize(query))
+        if position is not None:
+            return self.docs[position]
+        for term in set(tokenize(query)):
+            if is_code_token(term):
+                postings = self.postings.get(term, [])
+                if len(postings) == 1:
+                    return self.docs[postings[0][0]]
+        return None
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", str(text)).strip().casefold().rstrip("?!. ")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int = 60) -> List[Tuple[Document, float]]:
+    """Merge ranked document lists: score(d) = sum over lists of 1 / (k + rank)."""
+    fused: Dict[object, float] = defaultdict(float)
+    by_key: Dict[object, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = getattr(doc, "id", None) or (doc.page_content, doc.metadata.get("FAQ"))
+            by_key[key] = doc
+            fused[key] += 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [(by_key[key], score) for key, score in ordered]
@@ -0,0 +1,136 @@
+"""
+FAISS index backends for the FAQ vector store.
+
+The index type is chosen at ingest time and recorded in the FAQ manifest:
+
+  - flat   exact brute-force L2 scan (default, fine for a spreadsheet)
+  - ivf    IVF-Flat; trains `nlist` centroids, probes `nprobe` lists per query
+  - hnsw   HNSW graph; `hnsw_m` links per node, `ef_search` at query time
+  - sq8    flat scan over int8 scalar-quantized vectors (4x less memory)
+  - ivfpq  IVF + product quantization (`pq_m` sub-quantizers, 8 bits each;
+           needs at least 256 rows to train)
+
+`faiss` itself is imported where an index is built or configured, so
+importing this module stays cheap.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "sq8", "ivfpq")
+
+DEFAULT_INDEX_SPEC = {
+    "type": "flat",
+    "nlist": 256,
+    "nprobe": 8,
+    "hnsw_m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    "pq_m": 48,
+}
+
+# FAISS asks for roughly this many training points per IVF centroid.
+MIN_POINTS_PER_CENTROID = 39
+# Bits per PQ code; each sub-quantizer trains 2**PQ_NBITS centroids.
+PQ_NBITS = 8
+
+
+def index_spec(**overrides) -> dict:
+    """DEFAULT_INDEX_SPEC with `overrides` applied (None values ignored)."""
+    spec = dict(DEFAULT_INDEX_SPEC)
+    spec.update({k: v for k, v in overrides.items() if v is not None})
+    if spec["type"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAQ index type {spec['type']!r}; expected one of {', '.join(INDEX_TYPES)}")
+    return spec
+
+
+def create_index(spec: dict, dim: int, n_train: int) -> "faiss.Index":
+    """Create an empty (possibly untrained) index for `dim`-dimensional vectors."""
+    import faiss
+    kind = spec["type"]
+    # Never ask for more IVF lists than the training set can support.
+    nlist = max(1, min(int(spec["nlist"]), n_train // MIN_POINTS_PER_CENTROID or 1))
+    if kind == "flat":
+        return faiss.IndexFlatL2(dim)
+    if kind == "ivf":
+        return faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist, faiss.METRIC_L2)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, int(spec["hnsw_m"]))
+        index.hnsw.efConstruction = int(spec["ef_construction"])
+        return index
+    if kind == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    if kind == "ivfpq":
+        pq_m = int(spec["pq_m"])
+        if dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}")
+        if n_train < 2 ** PQ_NBITS:
+            raise ValueError(f"ivfpq needs at least {2 ** PQ_NBITS} training vectors for its {PQ_NBITS}-bit "
+                             f"codebooks, got {n_train}; use --index-type sq8 or flat for a corpus this small")
+        return faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, pq_m, PQ_NBITS)
+    raise ValueError(f"Unknown FAQ index type {kind!r}")
+
+
+def train_index(index: "faiss.Index", vectors: np.ndarray):
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(vectors, dtype="float32"))
+
+
+def configure_search(index: "faiss.Index", spec: dict):
+    """Apply query-time knobs (nprobe / efSearch) to a loaded index."""
+    import faiss
+    try:
+        faiss.extract_index_ivf(index).nprobe = int(spec["nprobe"])
+    except RuntimeError:
+        pass  # not an IVF index
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = int(spec["ef_search"])
+
+
+def supports_remove(spec: dict) -> bool:
+    """HNSW graphs cannot delete vectors; those indexes are rebuilt instead of synced."""
+    return spec.get("type", "flat") != "hnsw"
+
+
+def relevance_score(distance: float) -> float:
+    """Same L2 -> [0, 1] mapping the LangChain FAISS retriever applies to its score threshold."""
+    return 1.0 - distance / math.sqrt(2)
+
+
+def search_matrix(vector_store, queries: np.ndarray, k: int = 3,
+                  score_threshold: Optional[float] = None) -> List[List[Tuple[Document, float]]]:
+    """
+    Vectorized top-k search: one FAISS call for a (n_queries, dim) float32
+    matrix. Returns, per query, up to `k` (Document, relevance score) pairs,
+    best first.
+    """
+    matrix = np.ascontiguousarray(np.atleast_2d(queries), dtype="float32")
+    distances, indices = vector_store.index.search(matrix, k)
+    id_map: Dict[int, str] = vector_store.index_to_docstore_id
+    results = []
+    for row_distances, row_indices in zip(distances, indices):
+        hits = []
+        for distance, i in zip(row_distances, row_indices):
+            if i == -1:  # fewer than k candidates in the probed lists
+                continue
+            score = relevance_score(float(distance))
+            if score_threshold is not None and score < score_threshold:
+                continue
+            doc = vector_store.docstore.search(id_map[int(i)])
+            if isinstance(doc, Document):
+                hits.append((doc, score))
+        results.append(hits)
+    return results
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Fraction of exact top-k neighbours (`truth`) that the approximate search returned."""
+    k = truth.shape[1]
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth.tolist(), found.tolist()))
+    return hits / float(truth.shape[0] * k)
+
+
+def as_matrix(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    return np.asarray(vectors, dtype="float32")
@@ -0,0 +1,312 @@
+"""
+FAQ spreadsheet ingest.
+
+Each FAQ row gets a stable id (derived from its question cell) and a content
+hash. The hashes are stored in a manifest next to the FAISS index, so a sheet
+update only re-embeds added / changed rows and deletes removed ones instead of
+rebuilding the whole index.
+
+Run offline (the chatbot itself only loads the prebuilt index):
+
+    python -m src.faq_ingest --batch-size 64 --workers 4
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.faq_index import INDEX_TYPES, as_matrix, create_index, index_spec, supports_remove, train_index
+from src.faq_manifest import MANIFEST_VERSION, read_manifest, source_fingerprint, write_manifest
+from src.faq_rows import faq_fields
+
+# Fixed namespace so the same FAQ question always maps to the same id.
+FAQ_ID_NAMESPACE = uuid.UUID("5d7f3c1e-2b8a-4f0e-9c61-7a3e2d4b9f10")
+
+
+def load_faq_documents(xlsx_path: str) -> List[Document]:
+    """Parse the FAQ workbook into one Document per table row."""
+    try:
+        from langchain_community.document_loaders import UnstructuredExcelLoader
+        from langchain_text_splitters import HTMLSectionSplitter
+    except ImportError as e:
+        raise ImportError("Parsing the FAQ workbook needs the ingest extras: pip install -r requirements-ingest.txt") from e
+    loader = UnstructuredExcelLoader(xlsx_path, mode="elements")
+    docs = loader.load()
+    html_string = "\n".join([doc.metadata['text_as_html'] for doc in docs])
+    headers_to_split_on = [
+        ("tr", "FAQ"),
+    ]
+    html_splitter = HTMLSectionSplitter(headers_to_split_on)
+    return html_splitter.split_text(html_string)
+
+
+def _row_key(doc: Document) -> str:
+    # The question alone: editing an answer keeps the row's id (an update, not delete + add).
+    return re.sub(r"\s+", " ", faq_fields(doc).question).strip().casefold()
+
+
+def assign_row_ids(docs: List[Document]) -> Dict[str, Document]:
+    """
+    Map stable row ids to documents. Rows sharing the same question get an
+    occurrence suffix so their ids stay distinct but deterministic.
+    """
+    seen: Dict[str, int] = {}
+    rows: Dict[str, Document] = {}
+    for doc in docs:
+        key = _row_key(doc)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
+        rows[str(uuid.uuid5(FAQ_ID_NAMESPACE, key))] = doc
+    return rows
+
+
+def content_hash(doc: Document) -> str:
+    payload = json.dumps({"text": doc.page_content, "metadata": doc.metadata}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---- Embedding ----
+_worker_embeddings = None
+
+
+def _init_worker(model_name: str):
+    global _worker_embeddings
+    from langchain_huggingface import HuggingFaceEmbeddings
+    _worker_embeddings = HuggingFaceEmbeddings(model_name=model_name)
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+
+class BatchEmbedder(Embeddings):
+    """
+    Embeddings that split `embed_documents` into fixed-size batches and, with
+    workers > 1, fan them out over a process pool (one model copy per worker).
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64, workers: int = 1):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.rows_embedded = 0
+        self.embed_seconds = 0.0
+        self._local = None
+        self._pool = None
+
+    def _batches(self, texts: List[str]):
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        if self.workers > 1 and len(texts) > self.batch_size:
+            if self._pool is None:
+                # spawn: torch / tokenizers do not survive fork reliably
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name,),
+                )
+            vectors = [v for batch in self._pool.map(_embed_batch, self._batches(texts)) for v in batch]
+        else:
+            if self._local is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+                self._local = HuggingFaceEmbeddings(model_name=self.model_name)
+            vectors = [v for batch in self._batches(texts) for v in self._local.embed_documents(batch)]
+        self.rows_embedded += len(texts)
+        self.embed_seconds += time.perf_counter() - start
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# ---- Build / sync ----
+def _new_vector_store(embeddings, index) -> FAISS:
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+
+
+def save_index_atomically(vector_store: FAISS, index_dir: str, manifest: dict):
+    """
+    Write index files + manifest to a sibling temp directory and swap it into
+    place, so readers never see a half-written index.
+    """
+    target = Path(index_dir).resolve()
+    tmp_dir = target.parent / f".{target.name}.tmp-{os.getpid()}"
+    old_dir = target.parent / f".{target.name}.old-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    vector_store.save_local(str(tmp_dir))
+    write_manifest(str(tmp_dir), manifest)
+    if target.exists():
+        os.replace(target, old_dir)
+    os.replace(tmp_dir, target)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def build_faq_index(embeddings, xlsx_path: str, index_dir: str, spec: Optional[dict] = None) -> FAISS:
+    """
+    Full rebuild: embed every row, train the index if its type needs it
+    (see src.faq_index) and write index + manifest.
+    """
+    spec = spec or index_spec()
+    rows = assign_row_ids(load_faq_documents(xlsx_path))
+    docs = list(rows.values())
+    texts = [doc.page_content for doc in docs]
+    # Embed first so the index dimension comes from real output (no probe query).
+    vectors = embeddings.embed_documents(texts) if texts else [embeddings.embed_query("hello world")]
+    matrix = as_matrix(vectors)
+    index = create_index(spec, matrix.shape[1], len(texts))
+    train_index(index, matrix)
+    vector_store = _new_vector_store(embeddings, index)
+    if rows:
+        vector_store.add_embeddings(
+            text_embeddings=list(zip(texts, vectors)),
+            metadatas=[doc.metadata for doc in docs],
+            ids=list(rows.keys()),
+        )
+    save_index_atomically(vector_store, index_dir, {
+        "version": MANIFEST_VERSION,
+        "source": source_fingerprint(xlsx_path, None),
+        "index": spec,
+        "rows": {row_id: content_hash(doc) for row_id, doc in rows.items()},
+    })
+    print(f"FAISS {spec['type']} index built ({len(rows)} rows).")
+    return vector_store
+
+
+def sync_faq_index(vector_store: FAISS, xlsx_path: str, index_dir: str) -> dict:
+    """
+    Bring an existing index up to date with the workbook, embedding only
+    added / changed rows. Returns counts of added, updated, deleted and
+    unchanged rows.
+    """
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise ValueError(f"No FAQ manifest in {index_dir}; a full rebuild is required.")
+
+    rows = assign_row_ids(load_faq_documents(xlsx_path))
+    old_hashes: Dict[str, str] = manifest.get("rows", {})
+    new_hashes = {row_id: content_hash(doc) for row_id, doc in rows.items()}
+
+    added = [row_id for row_id in new_hashes if row_id not in old_hashes]
+    updated = [row_id for row_id in new_hashes if row_id in old_hashes and old_hashes[row_id] != new_hashes[row_id]]
+    deleted = [row_id for row_id in old_hashes if row_id not in new_hashes]
+
+    spec = manifest.get("index") or index_spec()
+    indexed_ids = set(vector_store.index_to_docstore_id.values())
+    to_remove = [row_id for row_id in deleted + updated if row_id in indexed_ids]
+    if to_remove and not supports_remove(spec):
+        raise ValueError(f"{spec['type']} index cannot delete rows; a full rebuild is required.")
+    if to_remove:
+        vector_store.delete(to_remove)
+
+    to_embed = added + updated
+    if to_embed:
+        vector_store.add_documents(documents=[rows[row_id] for row_id in to_embed], ids=to_embed)
+
+    summary = {
+        "added": len(added),
+        "updated": len(updated),
+        "deleted": len(deleted),
+        "unchanged": len(new_hashes) - len(added) - len(updated),
+    }
+    new_manifest = {
+        "version": MANIFEST_VERSION,
+        "source": source_fingerprint(xlsx_path, manifest),
+        "index": spec,
+        "rows": new_hashes,
+    }
+    if to_remove or to_embed:
+        save_index_atomically(vector_store, index_dir, new_manifest)
+    else:
+        write_manifest(index_dir, new_manifest)
+    print(f"FAISS index synced: {summary}")
+    return summary
+
+
+# ---- CLI ----
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the FAQ FAISS index from the FAQ workbook.")
+    parser.add_argument("--faqs", default="./faqs/customer_support_chatbot_faqs.xlsx", help="FAQ workbook (.xlsx)")
+    parser.add_argument("--index-dir", default="./src/faq_faiss_index", help="output index directory")
+    parser.add_argument("--model", default="sentence-transformers/all-mpnet-base-v2", help="embedding model name")
+    parser.add_argument("--batch-size", type=int, default=64, help="rows per embedding batch")
+    parser.add_argument("--workers", type=int, default=1, help="embedding processes (1 = in-process)")
+    parser.add_argument("--full", action="store_true", help="re-embed every row instead of syncing changes")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=None, help="FAISS backend (default: keep current, else flat)")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (ivf / ivfpq)")
+    parser.add_argument("--nprobe", type=int, default=None, help="IVF lists probed per query (ivf / ivfpq)")
+    parser.add_argument("--hnsw-m", type=int, default=None, help="HNSW links per node")
+    parser.add_argument("--ef-search", type=int, default=None, help="HNSW search breadth")
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers (ivfpq)")
+    args = parser.parse_args(argv)
+
+    manifest = read_manifest(args.index_dir)
+    current_spec = (manifest or {}).get("index") or index_spec()
+    spec = index_spec(**{
+        **current_spec,
+        "type": args.index_type, "nlist": args.nlist, "nprobe": args.nprobe,
+        "hnsw_m": args.hnsw_m, "ef_search": args.ef_search, "pq_m": args.pq_m,
+    })
+    # Changing the index structure needs a retrain / rebuild; query-time knobs do not.
+    structural = ("type", "nlist", "hnsw_m", "ef_construction", "pq_m")
+    full = args.full or manifest is None or any(spec[k] != current_spec.get(k) for k in structural)
+
+    embedder = BatchEmbedder(args.model, batch_size=args.batch_size, workers=args.workers)
+    start = time.perf_counter()
+    try:
+        vector_store = None
+        if not full:
+            try:
+                vector_store = FAISS.load_local(args.index_dir, embedder, allow_dangerous_deserialization=True)
+            except Exception as e:
+                print(f"Could not load existing index ({e}), doing a full rebuild.")
+        if vector_store is not None:
+            if spec != current_spec:
+                manifest["index"] = spec
+                write_manifest(args.index_dir, manifest)
+            try:
+                sync_faq_index(vector_store, args.faqs, args.index_dir)
+            except ValueError as e:
+                print(f"{e} Rebuilding.")
+                vector_store = None
+        if vector_store is None:
+            build_faq_index(embedder, args.faqs, args.index_dir, spec)
+    finally:
+        embedder.close()
+
+    elapsed = time.perf_counter() - start
+    rate = embedder.rows_embedded / embedder.embed_seconds if embedder.embed_seconds else 0.0
+    print(
+        f"Embedded {embedder.rows_embedded} rows in {embedder.embed_seconds:.2f}s "
+        f"({rate:.1f} rows/sec, batch={embedder.batch_size}, workers={embedder.workers}); total {elapsed:.2f}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+FAQ index manifest: which workbook an index was built from and the content
+hash of every row. Kept free of ingest-only dependencies (Excel parsing, HTML
+splitting) so the serving path can check index freshness cheaply.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "faq_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---- Manifest ----
+def read_manifest(index_dir: str) -> Optional[dict]:
+    path = Path(index_dir) / MANIFEST_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def write_manifest(index_dir: str, manifest: dict):
+    path = Path(index_dir) / MANIFEST_FILE
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def source_fingerprint(xlsx_path: str, manifest: Optional[dict]) -> dict:
+    stat = os.stat(xlsx_path)
+    source = (manifest or {}).get("source", {})
+    # mtime + size unchanged -> reuse the recorded hash instead of re-reading the file
+    if source.get("mtime") == stat.st_mtime and source.get("size") == stat.st_size and source.get("sha256"):
+        sha = source["sha256"]
+    else:
+        sha = file_sha256(xlsx_path)
+    return {"path": str(xlsx_path), "mtime": stat.st_mtime, "size": stat.st_size, "sha256": sha}
+
+
+def is_index_stale(index_dir: str, xlsx_path: str) -> bool:
+    """
+    True when the index has no manifest or was built from a different workbook.
+    Serving-only deploys may ship without the workbook; freshness cannot be
+    checked there, so the index is taken as current.
+    """
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        return True
+    if not os.path.exists(xlsx_path):
+        logger.info("FAQ workbook %s not found; skipping the index freshness check.", xlsx_path)
+        return False
+    return source_fingerprint(xlsx_path, manifest)["sha256"] != manifest["source"].get("sha256")
@@ -1,54 +1,241 @@
-import faiss
-from langchain_community.docstore.in_memory import InMemoryDocstore
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import UnstructuredExcelLoader
-from langchain_text_splitters import HTMLSectionSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from uuid import uuid4
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
 from langchain_core.tools import tool
 
+from src.embedding_cache import CachedEmbeddings
+from src.faq_bm25 import BM25Index, reciprocal_rank_fusion
+from src.faq_index import configure_search, index_spec, search_matrix
+from src.faq_manifest import is_index_stale, read_manifest
+from src.telemetry import span
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+FAQ_INDEX_DIR = "./src/faq_faiss_index"
+FAQ_XLSX_PATH = "./faqs/customer_support_chatbot_faqs.xlsx"
+
+# Query-embedding cache: LRU size in memory and optional SQLite spill file
+# (set FAQ_EMBEDDING_CACHE_PATH="" to keep the cache in memory only).
+EMBEDDING_CACHE_SIZE = int(os.getenv("FAQ_EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_PATH = os.getenv("FAQ_EMBEDDING_CACHE_PATH", "./data/embedding_cache.db")
+
+# Retrieval knobs. The index type itself is chosen at ingest time (see src.faq_index);
+# nprobe / ef_search override the values recorded in the index manifest.
+FAQ_TOP_K = int(os.getenv("FAQ_TOP_K", "1"))  # FAQ answers faq_tool returns, best first
+FAQ_SCORE_THRESHOLD = float(os.getenv("FAQ_SCORE_THRESHOLD", "0.2"))
+FAQ_NPROBE = os.getenv("FAQ_NPROBE")
+FAQ_EF_SEARCH = os.getenv("FAQ_EF_SEARCH")
+# Hybrid retrieval: candidates taken from each of BM25 and FAISS before rank
+# fusion, and the share of query terms a BM25-only hit must contain.
+FAQ_HYBRID_CANDIDATES = int(os.getenv("FAQ_HYBRID_CANDIDATES", "5"))
+FAQ_BM25_MIN_COVERAGE = float(os.getenv("FAQ_BM25_MIN_COVERAGE", "0.6"))
+
+# ---- Process-wide retriever state ----
+# The embedding model and FAISS index are loaded once per process and shared
+# by every session / thread. `_retriever_lock` only guards the first load.
+_embeddings = None
+_vector_store = None
+_bm25 = None
+_retriever_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics = {
+    "model_load_seconds": None,
+    "index_load_seconds": None,
+    "index_stale": None,
+    "index_version": None,
+    "queries": 0,
+    "query_seconds_total": 0.0,
+    "query_seconds_last": None,
+    "query_seconds_max": 0.0,
+    "lexical_fast_path": 0,
+    "hybrid_lookups": 0,
+    "lexical_only_answers": 0,
+}
+
+
+# faiss (via langchain_community) and sentence-transformers (via
+# langchain_huggingface) are imported on first load, not with this module.
+def _load_vector_store(embeddings):
+    from langchain_community.vectorstores import FAISS
 
-def get_faq_retriever():
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
     try:
-        vector_store = FAISS.load_local("./src/faq_faiss_index", embeddings, allow_dangerous_deserialization=True)
-        print("Loaded existing FAISS index.")
-    except:
-        print("Creating new FAISS index.")
-        loader = UnstructuredExcelLoader("./faqs/customer_support_chatbot_faqs.xlsx", mode="elements")
-        docs = loader.load()
-        html_string = "\n".join([doc.metadata['text_as_html'] for doc in docs])
-        headers_to_split_on = [
-            ("tr", "FAQ"),
-        ]
-        html_splitter = HTMLSectionSplitter(headers_to_split_on)
-        html_header_splits = html_splitter.split_text(html_string)
-        uuids = [str(uuid4()) for _ in range(len(html_header_splits))]
-
-        index = faiss.IndexFlatL2(len(embeddings.embed_query("hello world")))
-
-        vector_store = FAISS(
-            embedding_function=embeddings,
-            index=index,
-            docstore=InMemoryDocstore(),
-            index_to_docstore_id={},
-        )
-
-        vector_store.add_documents(documents=html_header_splits, ids=uuids)
-        vector_store.save_local("./src/faq_faiss_index")
-        print("FAISS index Saved.")
-
-    retriever = vector_store.as_retriever(search_type="similarity_score_threshold", search_kwargs={"score_threshold": 0.2, "k": 1})
-
-    return retriever
+        vector_store = FAISS.load_local(FAQ_INDEX_DIR, embeddings, allow_dangerous_deserialization=True)
+    except Exception as e:
+        raise RuntimeError(
+            f"FAQ index not found or unreadable in {FAQ_INDEX_DIR}. Build it offline with `python -m src.faq_ingest`."
+        ) from e
+    manifest = read_manifest(FAQ_INDEX_DIR) or {}
+    spec = index_spec(**{
+        **(manifest.get("index") or {}),
+        "nprobe": int(FAQ_NPROBE) if FAQ_NPROBE else None,
+        "ef_search": int(FAQ_EF_SEARCH) if FAQ_EF_SEARCH else None,
+    })
+    configure_search(vector_store.index, spec)
+    print(f"Loaded existing FAISS index ({spec['type']}, {vector_store.index.ntotal} vectors).")
+
+    stale = is_index_stale(FAQ_INDEX_DIR, FAQ_XLSX_PATH)
+    if stale:
+        print("FAISS index is older than the FAQ workbook; run `python -m src.faq_ingest` to update it.")
+    with _metrics_lock:
+        _metrics["index_stale"] = stale
+        # identifies the FAQ content answers were drawn from (see src.response_cache)
+        _metrics["index_version"] = (manifest.get("source") or {}).get("sha256") or f"unversioned-{vector_store.index.ntotal}"
+    return vector_store
+
+
+def get_faq_retriever():
+    """
+    Return the shared FAQ vector store, loading the embedding model and FAISS
+    index on first use. Safe to call from multiple threads.
+    """
+    global _embeddings, _vector_store, _bm25
+    if _vector_store is not None:
+        return _vector_store
+
+    with _retriever_lock:
+        if _vector_store is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+
+            start = time.perf_counter()
+            embeddings = CachedEmbeddings(
+                HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME),
+                model_name=EMBEDDING_MODEL_NAME,
+                max_entries=EMBEDDING_CACHE_SIZE,
+                disk_path=EMBEDDING_CACHE_PATH or None,
+            )
+            model_loaded = time.perf_counter()
+            vector_store = _load_vector_store(embeddings)
+            index_loaded = time.perf_counter()
+
+            with _metrics_lock:
+                _metrics["model_load_seconds"] = model_loaded - start
+                _metrics["index_load_seconds"] = index_loaded - model_loaded
+
+            _embeddings = embeddings
+            _bm25 = BM25Index.from_vector_store(vector_store)
+            _vector_store = vector_store  # set last: it marks the load as complete
+    return _vector_store
+
+
+def search_faq_batch(queries, k: int = 3, score_threshold: Optional[float] = None) -> List[List[Tuple[Document, float]]]:
+    """
+    Top-k FAQ search for many queries in one FAISS call.
+
+    `queries` is either a list of strings (embedded through the shared,
+    cached embedding model) or a float32 NumPy matrix of shape (n, dim).
+    Returns one list of (Document, relevance score) pairs per query, best first.
+    """
+    get_faq_retriever()
+    if isinstance(queries, np.ndarray):
+        matrix = queries
+    else:
+        with span("faq", "embed", queries=len(queries)):
+            matrix = np.asarray(_embeddings.embed_queries(list(queries)), dtype="float32")
+    with span("faq", "faiss_search", queries=len(matrix), k=k):
+        return search_matrix(_vector_store, matrix, k=k, score_threshold=score_threshold)
+
+
+def faq_lookup(query: str, k: int = FAQ_TOP_K) -> List[Tuple[Document, float]]:
+    """
+    Hybrid FAQ search. Exact lexical hits (verbatim question, unique error
+    code / product token) are answered from BM25 without running the
+    embedding model; otherwise BM25 and FAISS candidates that clear their
+    thresholds are merged with reciprocal rank fusion.
+    """
+    get_faq_retriever()
+    exact = _bm25.exact_match(query)
+    if exact is not None:
+        with _metrics_lock:
+            _metrics["lexical_fast_path"] += 1
+        return [(exact, 1.0)]
+
+    semantic = search_faq_batch([query], k=FAQ_HYBRID_CANDIDATES, score_threshold=FAQ_SCORE_THRESHOLD)[0]
+    with span("faq", "bm25_search"):
+        lexical = [doc for doc, _, coverage in _bm25.search(query, k=FAQ_HYBRID_CANDIDATES) if coverage >= FAQ_BM25_MIN_COVERAGE]
+    fused = reciprocal_rank_fusion([[doc for doc, _ in semantic], lexical])[:k]
+    with _metrics_lock:
+        _metrics["hybrid_lookups"] += 1
+        if fused and not semantic:
+            _metrics["lexical_only_answers"] += 1
+    return fused
+
+
+def faq_best_match(query: str) -> Optional[Tuple[Document, float, str]]:
+    """
+    Single best FAQ hit with a confidence score: (Document, score, "lexical" | "semantic").
+    Lexical exact matches score 1.0; semantic hits carry their FAISS relevance score.
+    """
+    get_faq_retriever()
+    exact = _bm25.exact_match(query)
+    if exact is not None:
+        with _metrics_lock:
+            _metrics["lexical_fast_path"] += 1
+        return exact, 1.0, "lexical"
+    hits = search_faq_batch([query], k=1)[0]
+    if not hits:
+        return None
+    return hits[0][0], hits[0][1], "semantic"
+
+
+def get_faq_index_version() -> str:
+    """Version of the loaded FAQ content (workbook hash from the index manifest)."""
+    get_faq_retriever()
+    with _metrics_lock:
+        return _metrics["index_version"]
+
+
+def get_faq_embeddings() -> CachedEmbeddings:
+    """The shared (cached) embedding model, e.g. for other similarity lookups."""
+    get_faq_retriever()
+    return _embeddings
+
+
+def warm_up_faq_retriever(background: bool = False, on_ready: Optional[Callable[[], None]] = None):
+    """
+    Eagerly load the FAQ retriever (e.g. at app start) so the first user
+    question does not pay the model / index load cost.
+    With background=True the load runs in a daemon thread and the thread is returned.
+    `on_ready` is called once the load finished (e.g. to report startup timings).
+    """
+    def load():
+        retriever = get_faq_retriever()
+        if on_ready is not None:
+            on_ready()
+        return retriever
+
+    if not background or _vector_store is not None:
+        return load()
+    thread = threading.Thread(target=load, name="faq-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_faq_metrics() -> dict:
+    """Snapshot of load-time and query-time metrics for the FAQ retriever."""
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    queries = snapshot["queries"]
+    snapshot["query_seconds_avg"] = snapshot["query_seconds_total"] / queries if queries else None
+    snapshot["loaded"] = _vector_store is not None
+    snapshot["embedding_cache"] = _embeddings.stats() if _embeddings is not None else None
+    return snapshot
 
 
 @tool
 def faq_tool(original_query: str) -> str:
     """Searches the FAQ documents and returns the most relevant answer. Always pass the original user query."""
-    retriever = get_faq_retriever()
-    docs = retriever.invoke(original_query)
+    start = time.perf_counter()
+    docs = faq_lookup(original_query, k=FAQ_TOP_K)
+    elapsed = time.perf_counter() - start
+    with _metrics_lock:
+        _metrics["queries"] += 1
+        _metrics["query_seconds_total"] += elapsed
+        _metrics["query_seconds_last"] = elapsed
+        _metrics["query_seconds_max"] = max(_metrics["query_seconds_max"], elapsed)
     if docs:
-        return docs[0].page_content
+        return "\n\n".join(doc.page_content for doc, _ in docs)
     else:
-        return "I'm sorry, I couldn't find an answer to your question in the FAQ."
\ No newline at end of file
+        return "I'm sorry, I couldn't find an answer to your question in the FAQ."
@@ -0,0 +1,26 @@
+"""
+Fields of one FAQ workbook row.
+
+The ingest splitter yields one Document per table row whose text (and
+`metadata["FAQ"]`) is the whole row, "Category\\nQuestion\\nAnswer". Row ids,
+the verbatim-question lookup and direct replies need the cells separately.
+"""
+from typing import NamedTuple
+
+from langchain_core.documents import Document
+
+
+class FaqRow(NamedTuple):
+    category: str
+    question: str
+    answer: str
+
+
+def faq_fields(doc: Document) -> FaqRow:
+    """Split a row Document into its cells; rows without the three columns are all question and answer."""
+    text = str(doc.metadata.get("FAQ") or doc.page_content)
+    cells = [cell.strip() for cell in text.split("\n") if cell.strip()]
+    if len(cells) >= 3:
+        return FaqRow(cells[0], cells[1], "\n".join(cells[2:]))
+    text = " ".join(cells)
+    return FaqRow("", text, text)
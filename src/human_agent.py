@@ -1,21 +1,23 @@
-from langchain_groq import ChatGroq
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import tool
-import streamlit as st
-import uuid
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
 
-def create_human_agent(api_key: str):
+from src.checkpointer import get_checkpointer
+from src.llm_clients import chat_model
+
+def create_human_agent(api_key: str, model: str = "llama-3.3-70b-versatile", llm=None, checkpointer=None):
     """
     Creates a natural human-like support agent (React agent with no tools).
+    `llm` / `checkpointer` replace the Groq model and the shared checkpointer (offline benchmarks).
     """
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",   # same family as your main agent
-        temperature=0.7,               # warmer for more natural replies
-        api_key=api_key,
-    )
+    if llm is None:
+        llm = chat_model(
+            model,                         # same model as the main agent
+            api_key,
+            temperature=0.7,               # warmer for more natural replies
+        )
 
-    checkpointer = InMemorySaver()
+    checkpointer = checkpointer or get_checkpointer()
 
     human_agent_prompt = """
     You are Alex, a real and empathetic customer support agent — not a bot.
@@ -58,15 +60,29 @@ def create_human_agent(api_key: str):
         checkpointer=checkpointer,
     )
 
-    @tool
-    def get_human_agent_response(user_input: str) -> str:
+    def human_agent_config(config: RunnableConfig) -> dict:
+        # One Alex conversation per support thread, alongside it in the checkpointer.
+        # Tools may run off the UI thread, so nothing here can come from session state.
+        parent_thread_id = ((config or {}).get("configurable") or {}).get("thread_id", "default")
+        return {"configurable": {"thread_id": f"{parent_thread_id}:human"}}
+
+    def get_human_agent_response(user_input: str, config: RunnableConfig) -> str:
         """Escalate to Alex, the human agent. Pass in a summary of the user's situation or request."""
-        if "human_agent_config" not in st.session_state:
-            st.session_state.human_agent_config = {"configurable": {"thread_id": uuid.uuid4()}}
         response = agent_executor.invoke(
             {"messages": [{"role": "system", "content": user_input}]},
-            config= st.session_state.human_agent_config
+            config=human_agent_config(config)
         )
         return response['messages'][-1].content
-    
-    return get_human_agent_response
\ No newline at end of file
+
+    async def aget_human_agent_response(user_input: str, config: RunnableConfig) -> str:
+        response = await agent_executor.ainvoke(
+            {"messages": [{"role": "system", "content": user_input}]},
+            config=human_agent_config(config)
+        )
+        return response['messages'][-1].content
+
+    return StructuredTool.from_function(
+        func=get_human_agent_response,
+        coroutine=aget_human_agent_response,
+        name="get_human_agent_response",
+    )
\ No newline at end of file
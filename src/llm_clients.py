@@ -0,0 +1,64 @@
+"""
+Pooled HTTP clients for the Groq chat models.
+
+Every ChatGroq instance built with the same API key shares one keep-alive
+connection pool (sync and async), instead of opening its own. The async
+client is bound to the event loop that first uses it. Each process drives
+the agents from a single loop (the async_tools background loop, or the ASGI
+server's), so sharing is safe.
+
+src.agent calls `release_http_clients` when it evicts the last cached agent
+for a key; the pools then live exactly as long as graphs still holding them.
+"""
+import hashlib
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+
+import httpx
+from langchain_groq import ChatGroq
+
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "50"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "20"))
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "60"))
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+_clients_lock = threading.Lock()
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible cache key for an API key (raw keys are never stored)."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def get_http_clients(api_key: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    fingerprint = key_fingerprint(api_key)
+    with _clients_lock:
+        if fingerprint not in _clients:
+            limits = httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS, max_keepalive_connections=GROQ_MAX_KEEPALIVE)
+            _clients[fingerprint] = (
+                httpx.Client(limits=limits, timeout=GROQ_TIMEOUT_SECONDS),
+                httpx.AsyncClient(limits=limits, timeout=GROQ_TIMEOUT_SECONDS),
+            )
+        return _clients[fingerprint]
+
+
+def release_http_clients(fingerprint: str):
+    """
+    Forget the shared pools for a key fingerprint, so the next graph for that
+    key gets fresh ones. They are not closed: graphs already built on them
+    (a Streamlit session's agent, a turn in flight) keep using them until they
+    are garbage-collected.
+    """
+    with _clients_lock:
+        if _clients.pop(fingerprint, None) is not None:
+            logger.info("released HTTP clients for key %s", fingerprint)
+
+
+def chat_model(model: str, api_key: str, **kwargs) -> ChatGroq:
+    """ChatGroq on the shared connection pool for `api_key`."""
+    http_client, http_async_client = get_http_clients(api_key)
+    return ChatGroq(model=model, api_key=api_key, http_client=http_client, http_async_client=http_async_client, **kwargs)
@@ -0,0 +1,204 @@
+"""
+Idempotent schema steps for existing SQLite databases.
+
+`Base.metadata.create_all` only creates missing tables; anything added to
+the schema later (search index, triggers, ...) is applied here so that old
+data/tickets.db files pick it up on the next start.
+"""
+import logging
+
+from sqlalchemy import text
+
+from src.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+
+# ---- Full-text search over tickets ----
+# External-content FTS5 table: stores only the index, rows stay in `tickets`.
+# Triggers keep it in sync for every write path (ORM, Core, raw SQL).
+TICKET_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+        subject, description,
+        content='tickets', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN
+        INSERT INTO tickets_fts(rowid, subject, description) VALUES (new.rowid, new.subject, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, subject, description) VALUES ('delete', old.rowid, old.subject, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF subject, description ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, subject, description) VALUES ('delete', old.rowid, old.subject, old.description);
+        INSERT INTO tickets_fts(rowid, subject, description) VALUES (new.rowid, new.subject, new.description);
+    END
+    """,
+]
+
+
+def ensure_ticket_fts(conn) -> bool:
+    """
+    Create the tickets_fts index + sync triggers and backfill it on first
+    creation. Returns False when this SQLite build has no FTS5 module.
+    """
+    exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickets_fts'")).first()
+    if exists:
+        return True
+    try:
+        for statement in TICKET_FTS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')"))
+    except Exception as e:  # "no such module: fts5"
+        logger.warning("Ticket full-text search unavailable, falling back to LIKE scans: %s", e)
+        return False
+    return True
+
+
+def has_ticket_fts(conn) -> bool:
+    return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickets_fts'")).first() is not None
+
+
+# ---- Secondary indexes ----
+def ensure_ticket_indexes(conn) -> list:
+    """
+    Create any index declared on Ticket that an older database lacks, and
+    rebuild those whose columns changed. Returns the names created.
+    """
+    created = []
+    existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tickets'"))}
+    for index in Ticket.__table__.indexes:
+        if index.name in existing:
+            columns = [row[2] for row in conn.execute(text(f'PRAGMA index_info("{index.name}")'))]
+            if columns == [c.name for c in index.columns]:
+                continue
+            index.drop(conn)
+        index.create(conn)
+        created.append(index.name)
+    if created:
+        conn.execute(text("ANALYZE tickets"))
+    return created
+
+
+# ---- Precomputed ticket statistics ----
+# Counters per (dimension, value) and a resolution-time histogram, kept up to
+# date by triggers so reading statistics costs the same at any table size.
+# Enum columns hold member names ("open", "urgent"), as SQLAlchemy stores them.
+TICKET_COUNTER_DIMENSIONS = {
+    "total": "''",
+    "status": "{row}.status",
+    "priority": "{row}.priority",
+    "category": "coalesce({row}.category, '')",
+    "assignee": "coalesce({row}.assigned_to, '')",
+    "status_priority": "{row}.status || ':' || {row}.priority",
+    "assignee_status": "coalesce({row}.assigned_to, '') || ':' || {row}.status",
+}
+# Upper bounds (hours) of the resolution-time buckets; one more bucket holds everything longer.
+RESOLUTION_BUCKET_HOURS = (1, 4, 8, 24, 72, 168, 336, 720)
+
+
+def _resolution_seconds(row: str) -> str:
+    return f"((julianday({row}.closed_at) - julianday({row}.created_at)) * 86400.0)"
+
+
+def _resolution_bucket(row: str) -> str:
+    seconds = _resolution_seconds(row)
+    cases = " ".join(f"WHEN {seconds} <= {hours * 3600} THEN {i}" for i, hours in enumerate(RESOLUTION_BUCKET_HOURS))
+    return f"CASE {cases} ELSE {len(RESOLUTION_BUCKET_HOURS)} END"
+
+
+def _stats_delta(row: str, delta: int) -> str:
+    """Trigger body statements adding `delta` for the ticket in `row` ("new" / "old")."""
+    statements = [
+        f"INSERT INTO ticket_counters(dimension, value, count) VALUES ('{dimension}', {expr.format(row=row)}, {delta}) "
+        f"ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count;"
+        for dimension, expr in TICKET_COUNTER_DIMENSIONS.items()
+    ]
+    statements.append(
+        f"INSERT INTO ticket_resolution_buckets(bucket, count, total_seconds) "
+        f"SELECT {_resolution_bucket(row)}, {delta}, {delta} * {_resolution_seconds(row)} "
+        f"WHERE {row}.closed_at IS NOT NULL AND {row}.created_at IS NOT NULL "
+        f"ON CONFLICT(bucket) DO UPDATE SET count = count + excluded.count, total_seconds = total_seconds + excluded.total_seconds;"
+    )
+    return "\n".join(statements)
+
+
+# The same aggregates computed from scratch: used to backfill, and by readers when the tables are missing.
+TICKET_COUNTERS_SELECT = " UNION ALL ".join(
+    f"SELECT '{dimension}' AS dimension, {expr.format(row='tickets')} AS value, count(*) AS count FROM tickets GROUP BY 2"
+    for dimension, expr in TICKET_COUNTER_DIMENSIONS.items()
+)
+TICKET_RESOLUTION_SELECT = (
+    f"SELECT {_resolution_bucket('tickets')} AS bucket, count(*) AS count, sum({_resolution_seconds('tickets')}) AS total_seconds "
+    f"FROM tickets WHERE closed_at IS NOT NULL AND created_at IS NOT NULL GROUP BY 1"
+)
+
+TICKET_STATS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS ticket_counters (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ticket_resolution_buckets (
+        bucket INTEGER PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0,
+        total_seconds REAL NOT NULL DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tickets_stats_ai AFTER INSERT ON tickets BEGIN
+        {_stats_delta("new", 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tickets_stats_ad AFTER DELETE ON tickets BEGIN
+        {_stats_delta("old", -1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tickets_stats_au
+    AFTER UPDATE OF status, priority, category, assigned_to, created_at, closed_at ON tickets BEGIN
+        {_stats_delta("old", -1)}
+        {_stats_delta("new", 1)}
+    END
+    """,
+]
+
+
+def ensure_ticket_stats(conn) -> bool:
+    """Create the statistics tables + triggers and backfill them on first creation. Returns True if created."""
+    exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ticket_counters'")).first()
+    if exists:
+        return False
+    for statement in TICKET_STATS_DDL:
+        conn.execute(text(statement))
+    conn.execute(text(f"INSERT INTO ticket_counters(dimension, value, count) {TICKET_COUNTERS_SELECT}"))
+    conn.execute(text(f"INSERT INTO ticket_resolution_buckets(bucket, count, total_seconds) {TICKET_RESOLUTION_SELECT}"))
+    return True
+
+
+def has_ticket_stats(conn) -> bool:
+    return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ticket_counters'")).first() is not None
+
+
+def run_migrations(engine) -> dict:
+    """Apply every schema step; returns {step name: result}."""
+    results = {}
+    if engine.dialect.name != "sqlite":
+        return results
+    with engine.begin() as conn:
+        results["ticket_fts"] = ensure_ticket_fts(conn)
+        results["ticket_indexes"] = ensure_ticket_indexes(conn)
+        results["ticket_stats"] = ensure_ticket_stats(conn)
+    return results
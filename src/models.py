@@ -1,7 +1,7 @@
 import uuid
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, Enum
+from sqlalchemy import Column, String, Text, DateTime, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -39,5 +39,12 @@ class Ticket(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     closed_at = Column(DateTime, nullable=True)
 
+    # Listing / triage access paths (existing databases get these via src.migrations)
+    __table_args__ = (
+        Index("ix_tickets_user_created_at", "user", "created_at", "id"),
+        Index("ix_tickets_status_priority", "status", "priority"),
+        Index("ix_tickets_assigned_to_status", "assigned_to", "status"),
+    )
+
     def __repr__(self):
         return f"<Ticket(id={self.id}, subject='{self.subject}', status='{self.status.name}')>"
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Semantic response cache for the support agent.
+
+Stores final answers of turns that used no tools or only FAQ lookups, keyed
+on the normalized query, its embedding and the FAQ index version. A new
+query reuses a stored answer when it normalizes to the same text or its
+embedding is at least `similarity_threshold` cosine-similar.
+
+Turns that called any other tool (ticket reads or mutations, escalation,
+date/time) are never stored, and neither is any turn the caller does not mark
+standalone (the first of its conversation). The cache is shared by all users,
+so a reply that may draw on earlier context (a name, a ticket) must not be
+served to anyone else; that includes FAQ answers given mid-conversation.
+Lookups apply the same test: a follow-up ("yes", "what about refunds?") means
+something different mid-conversation, so only standalone turns are looked
+up. Messages asking for a ticket action or naming a ticket never use the cache.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from src.embedding_cache import normalize_query
+from src.faq_retriever import get_faq_embeddings, get_faq_index_version
+from src.router import ACTION_RE, UUID_RE
+from src.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+CACHEABLE_TOOLS = frozenset({"faq_tool"})
+MIN_QUERY_WORDS = 3
+
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(6 * 3600)))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "5000"))
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    query: str
+    response: str
+    vector: np.ndarray
+    index_version: str
+    created: float
+    hits: int = 0
+
+
+@dataclass
+class CacheHit:
+    response: str
+    similarity: float
+    matched_query: str
+
+
+class SemanticResponseCache:
+    """TTL + size-bounded LRU of agent answers with embedding-similarity lookup."""
+
+    def __init__(self, similarity_threshold: float = 0.92, ttl_seconds: float = 6 * 3600, max_entries: int = 5000):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._matrix = None  # stacked unit vectors of _entries, rebuilt lazily
+        self._keys: list = []  # entry key of each _matrix row
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._skipped = 0
+        self._hits = 0
+        self._stores = 0
+        self._rejected = 0
+        self._hit_seconds = 0.0
+        self._miss_turns = 0
+        self._miss_seconds = 0.0
+
+    @staticmethod
+    def _embed(text: str) -> np.ndarray:
+        vector = np.asarray(get_faq_embeddings().embed_query(text), dtype="float32")
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _expire(self, now: float, version: str):
+        stale = [k for k, e in self._entries.items() if now - e.created > self.ttl_seconds or e.index_version != version]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._matrix = None
+
+    @staticmethod
+    def eligible(query: str, standalone: bool) -> bool:
+        """Whether a turn may be answered from / stored in the shared cache at all."""
+        return (standalone and len(query.split()) >= MIN_QUERY_WORDS
+                and not ACTION_RE.search(query) and not UUID_RE.search(query))
+
+    def lookup(self, query: str, standalone: bool = False) -> Optional[CacheHit]:
+        if not self.eligible(query, standalone):
+            with self._lock:
+                self._skipped += 1
+            return None
+        with span("cache", "response_lookup"):
+            return self._lookup(query)
+
+    def _lookup(self, query: str) -> Optional[CacheHit]:
+        start = time.perf_counter()
+        key = normalize_query(query)
+        version = get_faq_index_version()
+        with self._lock:
+            self._lookups += 1
+            self._expire(time.time(), version)
+            entry = self._entries.get(key)
+            empty = not self._entries
+        if entry is None and empty:
+            return None
+        similarity = 1.0
+        vector = self._embed(query) if entry is None else None  # outside the lock: a model forward pass
+        with self._lock:
+            if entry is None and self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries)
+                    self._matrix = np.stack([e.vector for e in self._entries.values()])
+                similarities = self._matrix @ vector
+                best = int(np.argmax(similarities))
+                similarity = float(similarities[best])
+                if similarity >= self.similarity_threshold:
+                    entry = self._entries.get(self._keys[best])
+            entry = self._entries.get(entry.key) if entry is not None else None  # may be evicted while embedding
+            if entry is None:
+                return None
+            entry.hits += 1
+            self._entries.move_to_end(entry.key)
+            self._hits += 1
+            self._hit_seconds += time.perf_counter() - start
+        logger.info("response cache hit (similarity %.3f) for %r via %r", similarity, query, entry.query)
+        return CacheHit(entry.response, similarity, entry.query)
+
+    def store(self, query: str, response: str, tools_used: Iterable[str], standalone: bool = False) -> bool:
+        """Cache an answer if the turn is safe to reuse; returns whether it was stored."""
+        tools = set(tools_used)
+        cacheable = response.strip() and tools <= CACHEABLE_TOOLS and self.eligible(query, standalone)
+        if not cacheable:
+            with self._lock:
+                self._rejected += 1
+            return False
+        key = normalize_query(query)
+        entry = CacheEntry(key, query, response, self._embed(query), get_faq_index_version(), time.time())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._stores += 1
+        return True
+
+    def record_miss(self, seconds: float):
+        """Report the agent latency of a turn the cache could not answer."""
+        with self._lock:
+            self._miss_turns += 1
+            self._miss_seconds += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg_miss = self._miss_seconds / self._miss_turns if self._miss_turns else None
+            return {
+                "entries": len(self._entries),
+                "lookups": self._lookups,
+                "skipped": self._skipped,
+                "hits": self._hits,
+                "hit_rate": self._hits / self._lookups if self._lookups else None,
+                "stores": self._stores,
+                "rejected": self._rejected,
+                "avg_hit_ms": 1000 * self._hit_seconds / self._hits if self._hits else None,
+                "avg_miss_s": avg_miss,
+                "latency_saved_s": (self._hits * avg_miss - self._hit_seconds) if avg_miss is not None else None,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """Process-wide response cache shared by all sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticResponseCache(RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE)
+        return _cache
@@ -0,0 +1,198 @@
+"""
+Deterministic fast-path router in front of the support agent.
+
+Trivial turns are answered without a Groq round-trip:
+
+  1. regex rules: greetings / thanks / goodbyes, "what time is it", and a
+     bare ticket UUID ("status of <uuid>") -> check_ticket
+  2. an embedding-similarity intent classifier over a few exemplar phrases,
+     reusing the FAQ embedding model and its query cache
+  3. a high-confidence FAQ hit (exact lexical match or semantic score above
+     `faq_min_score`) -> the FAQ answer (the answer cell, without the
+     category / question)
+
+Anything that mentions a ticket action or a human escalation, or that no rule
+matches confidently, falls through to the agent (route() returns None).
+"""
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.crud import check_ticket, get_current_datetime
+from src.faq_retriever import faq_best_match, get_faq_embeddings
+from src.faq_rows import faq_fields
+from src.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+UUID_RE = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+GREETING_RE = re.compile(r"^(hi+|hello+|hey+|hiya|howdy|greetings|good (morning|afternoon|evening))( there)?[\s!.,😊👋]*$", re.I)
+THANKS_RE = re.compile(r"^(thanks?( you)?( so much| a lot)?|thx|ty|cheers|much appreciated)[\s!.,😊🙏]*$", re.I)
+GOODBYE_RE = re.compile(r"^(bye+|goodbye|see (you|ya)|have a (good|nice|great) (day|one))[\s!.,😊👋]*$", re.I)
+DATETIME_RE = re.compile(r"^(what('s| is) (the )?(time|date|day)( (is it|today|now))?|what time is it|today'?s date)\??$", re.I)
+# Words that mean the user wants the agent to act (or a person), never a canned answer.
+ACTION_RE = re.compile(
+    r"\b(create|open|raise|file|new|update|change|set|close|reopen|delete|remove|cancel|assign|escalate|priority|"
+    r"human|agent|person|representative|someone|list|my tickets|search)\b",
+    re.I,
+)
+
+CANNED_REPLIES = {
+    "greeting": "Hello! 😊 How can I help you today? I can answer questions or help you create, check and manage support tickets.",
+    "thanks": "You're very welcome! 😊 Is there anything else I can help you with?",
+    "goodbye": "Thanks for reaching out — have a great day! 👋",
+}
+
+INTENT_EXAMPLES = {
+    "greeting": ["hi", "hello there", "hey, how are you", "good morning", "hi, is anyone there?"],
+    "thanks": ["thank you", "thanks a lot for your help", "that helped, thanks", "great, thank you so much"],
+    "goodbye": ["bye", "goodbye", "see you later", "that's all, have a nice day"],
+}
+
+
+@dataclass
+class RouteResult:
+    intent: str
+    reply: str
+    source: str  # "rule", "classifier" or "faq"
+    confidence: float = 1.0
+
+
+class IntentRouter:
+    """Fast-path router with bypass-rate and latency-saved counters."""
+
+    def __init__(self, faq_min_score: float = 0.6, intent_min_similarity: float = 0.8, use_embeddings: bool = True):
+        self.faq_min_score = faq_min_score
+        self.intent_min_similarity = intent_min_similarity
+        self.use_embeddings = use_embeddings
+        self._intent_matrix = None
+        self._intent_labels = None
+        self._lock = threading.Lock()
+        self._turns = 0
+        self._bypassed: Dict[str, int] = {}
+        self._routed_seconds = 0.0
+        self._agent_turns = 0
+        self._agent_seconds = 0.0
+
+    # ---- Classifier ----
+    def _intents(self):
+        if self._intent_matrix is None:
+            labels, texts = [], []
+            for label, examples in INTENT_EXAMPLES.items():
+                labels.extend([label] * len(examples))
+                texts.extend(examples)
+            matrix = np.asarray(get_faq_embeddings().embed_queries(texts), dtype="float32")
+            self._intent_matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._intent_labels = labels
+        return self._intent_matrix, self._intent_labels
+
+    def classify(self, message: str):
+        """(intent, cosine similarity) of the nearest exemplar."""
+        matrix, labels = self._intents()
+        vector = np.asarray(get_faq_embeddings().embed_query(message), dtype="float32")
+        similarities = matrix @ (vector / np.linalg.norm(vector))
+        best = int(np.argmax(similarities))
+        return labels[best], float(similarities[best])
+
+    # ---- Routing ----
+    def _route(self, message: str) -> Optional[RouteResult]:
+        if GREETING_RE.match(message):
+            return RouteResult("greeting", CANNED_REPLIES["greeting"], "rule")
+        if THANKS_RE.match(message):
+            return RouteResult("thanks", CANNED_REPLIES["thanks"], "rule")
+        if GOODBYE_RE.match(message):
+            return RouteResult("goodbye", CANNED_REPLIES["goodbye"], "rule")
+        if DATETIME_RE.match(message):
+            return RouteResult("datetime", get_current_datetime.invoke({}), "rule")
+
+        action = ACTION_RE.search(message)
+        ticket_ids = UUID_RE.findall(message)
+        if len(ticket_ids) == 1 and not action:
+            return RouteResult("check_ticket", check_ticket.invoke({"ticket_id": ticket_ids[0]}), "rule")
+        if action or ticket_ids:
+            return None
+
+        if not self.use_embeddings:
+            return None
+        # Short small-talk turns go to the classifier; longer ones are questions.
+        if len(message.split()) <= 8:
+            intent, similarity = self.classify(message)
+            if similarity >= self.intent_min_similarity:
+                return RouteResult(intent, CANNED_REPLIES[intent], "classifier", similarity)
+
+        match = faq_best_match(message)
+        if match is not None:
+            doc, score, _ = match
+            if score >= self.faq_min_score:
+                # No model pass to tidy the row up, so reply with the answer cell only.
+                return RouteResult("faq", faq_fields(doc).answer, "faq", score)
+        return None
+
+    def route(self, message: str) -> Optional[RouteResult]:
+        """A direct reply for a trivial turn, or None to hand the turn to the agent."""
+        text = str(message).strip()
+        start = time.perf_counter()
+        try:
+            with span("router", "route"):
+                result = self._route(text) if text else None
+        except Exception as e:  # never let the fast path break a turn
+            logger.warning("Router failed, falling through to the agent: %s", e)
+            result = None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._turns += 1
+            if result is not None:
+                self._bypassed[result.intent] = self._bypassed.get(result.intent, 0) + 1
+                self._routed_seconds += elapsed
+        if result is not None:
+            logger.info("router bypass intent=%s source=%s confidence=%.2f in %.1f ms",
+                        result.intent, result.source, result.confidence, elapsed * 1000)
+        return result
+
+    def record_agent_turn(self, seconds: float):
+        """Report how long a full agent turn took (baseline for latency saved)."""
+        with self._lock:
+            self._agent_turns += 1
+            self._agent_seconds += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            bypassed = sum(self._bypassed.values())
+            avg_agent = self._agent_seconds / self._agent_turns if self._agent_turns else None
+            return {
+                "turns": self._turns,
+                "bypassed": bypassed,
+                "bypass_rate": bypassed / self._turns if self._turns else None,
+                "bypassed_by_intent": dict(self._bypassed),
+                "avg_routed_ms": 1000 * self._routed_seconds / bypassed if bypassed else None,
+                "avg_agent_turn_s": avg_agent,
+                "latency_saved_s": (bypassed * avg_agent - self._routed_seconds) if avg_agent is not None else None,
+            }
+
+
+def record_routed_turn(agent, config: dict, user_message: str, reply: str):
+    """Append a fast-path exchange to the agent's thread so later turns keep the context."""
+    agent.update_state(
+        config,
+        {"messages": [HumanMessage(content=user_message), AIMessage(content=reply)]},
+        as_node="agent",
+    )
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> IntentRouter:
+    """Process-wide router shared by all sessions."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = IntentRouter()
+        return _router
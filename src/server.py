@@ -0,0 +1,283 @@
+"""
+Headless ASGI service for the support agent.
+
+    GROQ_API_KEY=... uvicorn src.server:app --workers 2
+
+One agent graph, embedding model, FAQ index and DB engine per worker process,
+shared by every session. Conversations are identified by the `thread_id`
+clients send (a new one is issued when omitted) and live in the shared
+checkpointer, so any worker can serve any turn.
+
+Chat:
+  POST /chat               {"message", "thread_id"?} -> final reply as JSON
+  POST /chat/stream        same body, reply streamed as server-sent events
+  WS   /chat/ws            send {"message", "thread_id"?}, receive event JSON per token
+
+Events: token {"text"}, tool {"name", "content"}, done {"thread_id", "reply", "source"}
+(source: "router", "cache" or "agent"), error {"detail"}.
+
+Tickets: POST /tickets, GET /tickets?user=&status=&assigned_to=&page_size=&page_token=,
+GET /tickets/search?q=, GET /tickets/stats, GET|PATCH|DELETE /tickets/{ticket_id}.
+"""
+from src import startup  # first, so the import phase covers the imports below
+
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from langchain_core.messages import AIMessageChunk, ToolMessage
+from pydantic import BaseModel
+
+from src import crud
+from src.agent import agent_factory_stats, get_agent
+from src.db import init_db
+from src.faq_retriever import get_faq_metrics, get_faq_retriever
+from src.models import Ticket
+from src.response_cache import get_response_cache
+from src.router import get_router, record_routed_turn
+from src.telemetry import render_prometheus, snapshot, trace_turn
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+startup.mark_imports_done()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("Set GROQ_API_KEY to start the support API.")
+    with startup.phase("db_init"):
+        await run_in_threadpool(init_db)
+    with startup.phase("agent_build"):
+        app.state.agent = get_agent(api_key)
+    await run_in_threadpool(get_faq_retriever)  # model_load / index_load are recorded by the retriever
+    app.state.router = get_router()
+    app.state.response_cache = get_response_cache()
+    startup.log_startup_report()
+    yield
+
+
+app = FastAPI(title="Customer Support API", lifespan=lifespan)
+
+
+# ---- Chat ----
+class ChatRequest(BaseModel):
+    message: str
+    thread_id: Optional[str] = None
+
+
+async def chat_events(thread_id: str, message: str, callbacks: list) -> AsyncIterator[dict]:
+    """Events for one user turn: router / response cache fast paths, else the streamed agent."""
+    agent, router, cache = app.state.agent, app.state.router, app.state.response_cache
+    config = {"configurable": {"thread_id": thread_id}}
+
+    standalone = not (await agent.aget_state(config)).values.get("messages")
+    routed = await run_in_threadpool(router.route, message)
+    cached = await run_in_threadpool(cache.lookup, message, standalone) if routed is None else None
+    if routed is not None or cached is not None:
+        reply = routed.reply if routed is not None else cached.response
+        await run_in_threadpool(record_routed_turn, agent, config, message, reply)
+        yield {"event": "token", "text": reply}
+        yield {"event": "done", "thread_id": thread_id, "reply": reply, "source": "router" if routed is not None else "cache"}
+        return
+
+    start = time.perf_counter()
+    reply, tools_used = "", set()
+    async for chunk, metadata in agent.astream({"messages": [{"role": "user", "content": message}]},
+                                               stream_mode="messages", config={**config, "callbacks": callbacks}):
+        node = metadata.get("langgraph_node")
+        if isinstance(chunk, AIMessageChunk) and node == "agent":
+            tools_used.update(c["name"] for c in chunk.tool_call_chunks if c.get("name"))
+            if chunk.content:
+                reply += chunk.content
+                yield {"event": "token", "text": chunk.content}
+        elif isinstance(chunk, ToolMessage):
+            yield {"event": "tool", "name": chunk.name, "content": chunk.content}
+    elapsed = time.perf_counter() - start
+    router.record_agent_turn(elapsed)
+    cache.record_miss(elapsed)
+    await run_in_threadpool(cache.store, message, reply, tools_used, standalone)
+    yield {"event": "done", "thread_id": thread_id, "reply": reply, "source": "agent"}
+
+
+async def safe_chat_events(thread_id: str, message: str) -> AsyncIterator[dict]:
+    try:
+        with trace_turn("turn", thread_id=thread_id) as trace:
+            async with aclosing(chat_events(thread_id, message, [trace.callbacks])) as events:
+                async for event in events:
+                    yield event
+    except Exception as e:
+        logger.exception("chat turn failed (thread %s)", thread_id)
+        yield {"event": "error", "detail": str(e)}
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    thread_id = request.thread_id or str(uuid.uuid4())
+    # Close the generator here, in this task's context, so the turn trace is reset and recorded cleanly.
+    async with aclosing(safe_chat_events(thread_id, request.message)) as events:
+        async for event in events:
+            if event["event"] == "done":
+                return event
+            if event["event"] == "error":
+                raise HTTPException(status_code=502, detail=event["detail"])
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    thread_id = request.thread_id or str(uuid.uuid4())
+
+    async def sse():
+        # Closed here if the client disconnects, so the agent stream is finalized in this task.
+        async with aclosing(safe_chat_events(thread_id, request.message)) as events:
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.websocket("/chat/ws")
+async def chat_ws(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        while True:
+            request = ChatRequest(**await websocket.receive_json())
+            thread_id = request.thread_id or str(uuid.uuid4())
+            async with aclosing(safe_chat_events(thread_id, request.message)) as events:
+                async for event in events:
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "startup": startup.startup_report(),
+        "agents": agent_factory_stats(),
+        "router": app.state.router.stats(),
+        "response_cache": app.state.response_cache.stats(),
+        "faq": get_faq_metrics(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency / token histograms in Prometheus text format (sampled turns only)."""
+    return render_prometheus()
+
+
+@app.get("/metrics.json")
+async def metrics_json():
+    return snapshot()
+
+
+# ---- Tickets ----
+# Plain `def` endpoints: FastAPI runs them on its thread pool, next to the event loop.
+class TicketCreate(BaseModel):
+    user: str
+    subject: str
+    description: str
+    priority: Optional[str] = "medium"
+    category: Optional[str] = None
+
+
+class TicketUpdate(BaseModel):
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    assigned_to: Optional[str] = None
+
+
+def _ticket_dict(t: Ticket) -> dict:
+    return {
+        "id": t.id,
+        "user": t.user,
+        "subject": t.subject,
+        "description": t.description,
+        "priority": t.priority.value,
+        "status": t.status.value,
+        "assigned_to": t.assigned_to,
+        "category": t.category,
+        "created_at": t.created_at.isoformat() if t.created_at else None,
+        "updated_at": t.updated_at.isoformat() if t.updated_at else None,
+        "closed_at": t.closed_at.isoformat() if t.closed_at else None,
+    }
+
+
+def _get_ticket(ticket_id: str) -> dict:
+    with crud.get_session() as session:
+        ticket = session.get(Ticket, ticket_id)
+        if ticket is None:
+            raise HTTPException(status_code=404, detail="Ticket not found.")
+        return _ticket_dict(ticket)
+
+
+def _single_result(results: list) -> dict:
+    result = results[0]
+    if not result["ok"]:
+        status_code = 404 if result["error"] == "Ticket not found." else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    return result
+
+
+@app.post("/tickets", status_code=201)
+def create_ticket(body: TicketCreate):
+    result = _single_result(crud.bulk_create_tickets([body.model_dump()]))
+    return _get_ticket(result["id"])
+
+
+@app.get("/tickets")
+def list_tickets(user: Optional[str] = None, status: Optional[str] = None, assigned_to: Optional[str] = None,
+                 page_size: int = 50, page_token: Optional[str] = None):
+    with crud.get_session() as session:
+        try:
+            tickets, next_token = crud.list_tickets_page(session, user=user, status=status, assigned_to=assigned_to,
+                                                         page_size=min(page_size, 500), page_token=page_token)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"tickets": [_ticket_dict(t) for t in tickets], "next_page_token": next_token}
+
+
+@app.get("/tickets/stats")
+def ticket_stats():
+    """Counts by status / priority / category / assignee and resolution-time percentiles (precomputed)."""
+    with crud.get_session() as session:
+        return crud.ticket_stats(session)
+
+
+@app.get("/tickets/search")
+def search_tickets(q: str, limit: int = 50):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Please provide a search query.")
+    with crud.get_session() as session:
+        return {"tickets": [_ticket_dict(t) for t in crud.search_ticket_rows(session, q.strip(), min(limit, 500))]}
+
+
+@app.get("/tickets/{ticket_id}")
+def get_ticket(ticket_id: str):
+    return _get_ticket(ticket_id)
+
+
+@app.patch("/tickets/{ticket_id}")
+def update_ticket(ticket_id: str, body: TicketUpdate):
+    try:
+        _single_result(crud.bulk_update_tickets(ticket_ids=[ticket_id], **body.model_dump()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _get_ticket(ticket_id)
+
+
+@app.delete("/tickets/{ticket_id}", status_code=204)
+def delete_ticket(ticket_id: str):
+    _single_result(crud.bulk_delete_tickets(ticket_ids=[ticket_id]))
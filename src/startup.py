@@ -0,0 +1,73 @@
+"""
+Cold-start timing for the app entry points.
+
+Import this module before the rest of `src` so PROCESS_START is taken as
+early as possible. Then record the phases:
+
+    from src import startup
+    ...imports...
+    startup.mark_imports_done()
+    with startup.phase("db_init"):
+        init_db()
+
+`startup_report()` adds the FAQ model / index load times recorded by
+src.faq_retriever (when it has loaded), and `log_startup_report()` logs the
+breakdown once per process.
+"""
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROCESS_START = time.perf_counter()
+
+_phases: "OrderedDict[str, float]" = OrderedDict()
+_lock = threading.Lock()
+_reported = False
+
+
+def record(name: str, seconds: float):
+    """Record a phase; only the first measurement of each phase counts (later ones are warm)."""
+    with _lock:
+        _phases.setdefault(name, seconds)
+
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def mark_imports_done():
+    record("import", time.perf_counter() - PROCESS_START)
+
+
+def startup_report() -> dict:
+    with _lock:
+        report = dict(_phases)
+    retriever = sys.modules.get("src.faq_retriever")  # don't import it just to report
+    if retriever is not None:
+        metrics = retriever.get_faq_metrics()
+        if metrics["model_load_seconds"] is not None:
+            report["model_load"] = metrics["model_load_seconds"]
+            report["index_load"] = metrics["index_load_seconds"]
+    report["since_process_start"] = time.perf_counter() - PROCESS_START
+    return report
+
+
+def log_startup_report():
+    global _reported
+    with _lock:
+        if _reported:
+            return
+        _reported = True
+    report = startup_report()
+    breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report.items())
+    logger.info("startup: %s", breakdown)
@@ -0,0 +1,338 @@
+"""
+Lightweight tracing and latency histograms for the support stack.
+
+A turn is traced with `trace_turn(...)`. The returned trace's `callbacks`
+go into the agent's run config and time each agent step, LLM call (with
+prompt / completion tokens) and tool call. Code running inside the turn
+(FAQ embedding and FAISS search, SQL statements via `instrument_engine`)
+opens spans with `span(...)`; they attach to the turn through a context
+variable. async_tools carries that variable into its worker threads.
+
+Sampling: each turn is sampled with probability TELEMETRY_SAMPLE_RATE (work
+outside a turn, e.g. batch jobs, is sampled per span). Unsampled work only
+pays a context-variable lookup. Sampled spans feed the histograms and a
+ring buffer of recent spans. So histogram counts describe the sampled
+population, not every request.
+
+Export: `render_prometheus()` (text exposition format, served at /metrics by
+src.server) or `dump_json()`, which writes to TELEMETRY_JSON_PATH when set.
+"""
+import bisect
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1") != "0"
+TELEMETRY_SAMPLE_RATE = float(os.getenv("TELEMETRY_SAMPLE_RATE", "0.1"))
+TELEMETRY_MAX_SPANS = int(os.getenv("TELEMETRY_MAX_SPANS", "5000"))
+TELEMETRY_JSON_PATH = os.getenv("TELEMETRY_JSON_PATH", "")
+TELEMETRY_DUMP_INTERVAL = float(os.getenv("TELEMETRY_DUMP_INTERVAL", "60"))
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+# ---- Histograms ----
+class Histogram:
+    """Prometheus-style histogram with labelled series."""
+
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> per-bucket counts (+Inf last), then sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        result = []
+        for key, series in sorted(items):
+            cumulative, total = [], 0
+            for count in series[:len(self.buckets)]:
+                total += count
+                cumulative.append(total)
+            result.append({"labels": dict(key), "buckets": dict(zip(self.buckets, cumulative)),
+                           "sum": series[-2], "count": series[-1]})
+        return result
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for series in self.snapshot():
+            labels = [f'{k}="{_escape(v)}"' for k, v in series["labels"].items()]
+            bounds = [(f"{bound:g}", count) for bound, count in series["buckets"].items()] + [("+Inf", series["count"])]
+            for bound, count in bounds:
+                lines.append(self.name + "_bucket{" + ",".join(labels + [f'le="{bound}"']) + "} " + str(count))
+            suffix = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {series['sum']:.6f}")
+            lines.append(f"{self.name}_count{suffix} {series['count']}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_histograms: Dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(name: str, help: str, buckets=LATENCY_BUCKETS) -> Histogram:
+    with _histograms_lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(name, help, buckets)
+        return _histograms[name]
+
+
+SPAN_SECONDS = histogram("support_span_duration_seconds", "Duration of traced operations by kind and name.")
+LLM_TOKENS = histogram("support_llm_tokens", "Tokens per LLM call by model and kind (prompt / completion).", TOKEN_BUCKETS)
+
+
+# ---- Traces and spans ----
+class Trace:
+    def __init__(self, name: str, sampled: bool, **attrs):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.sampled = sampled
+        self.attrs = attrs
+        self.spans: List[dict] = []
+        self.callbacks = TracingCallbackHandler(self)
+        self._lock = threading.Lock()
+
+    def add(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("support_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("support_span", default=None)
+_recent_spans: deque = deque(maxlen=TELEMETRY_MAX_SPANS)
+_last_dump = 0.0
+_dump_lock = threading.Lock()
+
+
+def _sampled() -> Optional[Trace]:
+    """The current trace if it is sampled; outside a turn, a sampled throwaway trace (or None)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        return trace if trace.sampled else None
+    if TELEMETRY_ENABLED and random.random() < TELEMETRY_SAMPLE_RATE:
+        return Trace("background", True)
+    return None
+
+
+def record_span(trace: Trace, kind: str, name: str, start: float, seconds: float,
+                parent_id: Optional[str] = None, span_id: Optional[str] = None, **attrs) -> dict:
+    span = {"trace_id": trace.trace_id, "span_id": span_id or uuid.uuid4().hex[:16], "parent_id": parent_id,
+            "kind": kind, "name": name, "start": start, "seconds": seconds, **attrs}
+    SPAN_SECONDS.observe(seconds, kind=kind, name=name)
+    trace.add(span)
+    _recent_spans.append(span)
+    return span
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """Time the enclosed block as a child of the current span (no-op when not sampled)."""
+    trace = _sampled()
+    if trace is None:
+        yield None
+        return
+    span_id = uuid.uuid4().hex[:16]
+    token = _current_span.set(span_id)
+    wall, start = time.time(), time.perf_counter()
+    try:
+        yield trace
+    finally:
+        _current_span.reset(token)
+        record_span(trace, kind, name, wall, time.perf_counter() - start, _current_span.get(), span_id, **attrs)
+
+
+@contextmanager
+def trace_turn(name: str = "turn", **attrs):
+    """Open a (possibly unsampled) trace for one user turn; yields the Trace."""
+    trace = Trace(name, TELEMETRY_ENABLED and random.random() < TELEMETRY_SAMPLE_RATE, **attrs)
+    trace_token = _current_trace.set(trace)
+    try:
+        with span("turn", name, **attrs):
+            yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        if trace.sampled:
+            logger.info("trace %s %s: %s", trace.trace_id, name, summarize_trace(trace))
+            maybe_dump()
+
+
+def summarize_trace(trace: Trace) -> dict:
+    """Total seconds and count per span kind for one trace."""
+    totals: Dict[str, list] = {}
+    for s in trace.spans:
+        entry = totals.setdefault(s["kind"], [0.0, 0])
+        entry[0] += s["seconds"]
+        entry[1] += 1
+    return {kind: {"seconds": round(seconds, 4), "count": count} for kind, (seconds, count) in totals.items()}
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain callbacks -> spans for agent steps, LLM calls and tool calls of one trace."""
+
+    run_inline = True
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self._open: Dict[object, tuple] = {}
+
+    def _start(self, run_id, parent_run_id, kind: str, name: str, **attrs):
+        if self.trace.sampled:
+            self._open[run_id] = (kind, name, time.time(), time.perf_counter(), parent_run_id, attrs)
+
+    def _end(self, run_id, **extra):
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        kind, name, wall, start, parent_run_id, attrs = opened
+        record_span(self.trace, kind, name, wall, time.perf_counter() - start,
+                    str(parent_run_id) if parent_run_id else None, run_id=str(run_id), **attrs, **extra)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, parent_run_id, "step", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, parent_run_id, "llm", model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        opened = self._open.get(run_id)
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if opened is not None and prompt_tokens is not None:
+            LLM_TOKENS.observe(prompt_tokens, model=opened[1], kind="prompt")
+            LLM_TOKENS.observe(completion_tokens or 0, model=opened[1], kind="completion")
+        self._end(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "tool", kwargs.get("name") or (serialized or {}).get("name") or "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=type(error).__name__)
+
+
+def _token_usage(response):
+    """(prompt, completion) tokens from an LLMResult, or (None, None)."""
+    try:
+        usage = response.generations[0][0].message.usage_metadata
+        if usage:
+            return usage.get("input_tokens"), usage.get("output_tokens")
+    except (AttributeError, IndexError):
+        pass
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    return None, None
+
+
+# ---- SQL ----
+def instrument_engine(engine):
+    """Time every SQL statement of sampled traces (label: statement verb)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        trace = _sampled()
+        conn.info.setdefault("telemetry", []).append((trace, time.time(), time.perf_counter()) if trace else None)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("telemetry")
+        entry = stack.pop() if stack else None
+        if entry is not None:
+            trace, wall, start = entry
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+            record_span(trace, "sql", verb, wall, time.perf_counter() - start, _current_span.get(),
+                        rows=cursor.rowcount, executemany=executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        stack = conn.info.get("telemetry") if conn is not None else None
+        if stack:
+            stack.pop()
+
+    return engine
+
+
+# ---- Export ----
+def render_prometheus() -> str:
+    with _histograms_lock:
+        histograms = list(_histograms.values())
+    return "\n".join(line for h in histograms for line in h.render()) + "\n"
+
+
+def snapshot() -> dict:
+    with _histograms_lock:
+        histograms = list(_histograms.values())
+    return {
+        "sample_rate": TELEMETRY_SAMPLE_RATE if TELEMETRY_ENABLED else 0.0,
+        "histograms": {h.name: {"help": h.help, "series": h.snapshot()} for h in histograms},
+        "recent_spans": list(_recent_spans),
+    }
+
+
+def dump_json(path: str = None) -> str:
+    path = path or TELEMETRY_JSON_PATH
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def maybe_dump():
+    """Write the JSON dump if TELEMETRY_JSON_PATH is set and the last one is older than the interval."""
+    global _last_dump
+    if not TELEMETRY_JSON_PATH:
+        return
+    with _dump_lock:
+        if time.monotonic() - _last_dump < TELEMETRY_DUMP_INTERVAL:
+            return
+        _last_dump = time.monotonic()
+    try:
+        dump_json()
+    except OSError as e:
+        logger.warning("Could not write telemetry dump: %s", e)
@@ -1,6 +1,13 @@
 import streamlit as st
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from src.agent import get_agent
+from src import startup  # first, so the import phase covers everything below
+from src.agent import agent_factory_stats, get_agent
+from src.async_tools import stream_turn
+from src.db import init_db
+from src.faq_retriever import warm_up_faq_retriever
+from src.response_cache import get_response_cache
+from src.router import get_router, record_routed_turn
+from src.telemetry import trace_turn
+import time
 import uuid
 import logging
 
@@ -12,6 +19,21 @@ if not logger.handlers:
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
     handler.setFormatter(formatter)
     logger.addHandler(handler)
+    # Library modules (prompt token counts, retrieval, ...) log under "src"
+    src_logger = logging.getLogger("src")
+    src_logger.setLevel(logging.INFO)
+    src_logger.addHandler(handler)
+
+startup.mark_imports_done()
+with startup.phase("db_init"):
+    init_db()
+
+# Load the FAQ embedding model / index once per process, off the UI thread,
+# then log the startup breakdown (import, DB init, model load, index load).
+warm_up_faq_retriever(background=True, on_ready=startup.log_startup_report)
+
+router = get_router()
+response_cache = get_response_cache()
 
 st.title("💬 Customer Support Chatbot")
 groq_api_key = st.text_input("Groq API Key", type="password")
@@ -22,9 +44,12 @@ else:
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "agent_config" not in st.session_state:
-        st.session_state.agent_config = {"configurable": {"thread_id": uuid.uuid4()}}
+        st.session_state.agent_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
     if "agent" not in st.session_state:
-        st.session_state.agent = get_agent(groq_api_key)
+        # Shared compiled graph; this session's state lives under its thread_id
+        with startup.phase("agent_build"):
+            st.session_state.agent = get_agent(groq_api_key)
+        logger.info("agent factory stats: %s", agent_factory_stats())
 
     # Display chat history
     for message in st.session_state.messages:
@@ -41,25 +66,39 @@ else:
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Collect messages for LLM input
-        chat_history = [
-            HumanMessage(content=m["content"]) if m["role"] == "user"
-            else AIMessage(content=m["content"]) if m["role"] == "assistant"
-            else SystemMessage(content=m["content"])
-            for m in st.session_state.messages
-        ]
-
         # Stream and display assistant's response
         with st.chat_message("assistant"):
             response_text = ""
             response_area = st.empty()
-            for chunk in st.session_state.agent.stream({"messages": [{"role": "user", "content": prompt}]},stream_mode="updates", config= st.session_state.agent_config):
-                logger.info(chunk)
-                if 'agent' in chunk:
-                    response_text += chunk['agent']['messages'][-1].content
-                elif 'tools' in chunk:
-                    st.toast(chunk['tools']['messages'][-1].content)
-                response_area.markdown(response_text)
+            with trace_turn("turn", thread_id=st.session_state.agent_config["configurable"]["thread_id"]) as trace:
+                # Only the first turn of a conversation is standalone enough to share with other users
+                standalone = len(st.session_state.messages) == 1
+                routed = router.route(prompt)
+                cached = response_cache.lookup(prompt, standalone) if routed is None else None
+                if routed is not None or cached is not None:
+                    # Trivial or previously answered turn: reply directly and record it in the agent's thread
+                    response_text = routed.reply if routed is not None else cached.response
+                    record_routed_turn(st.session_state.agent, st.session_state.agent_config, prompt, response_text)
+                    response_area.markdown(response_text)
+                else:
+                    turn_start = time.perf_counter()
+                    tools_used = set()
+                    config = {**st.session_state.agent_config, "callbacks": [trace.callbacks]}
+                    for chunk in stream_turn(st.session_state.agent, prompt, config):
+                        logger.debug(chunk)
+                        if 'agent' in chunk:
+                            last = chunk['agent']['messages'][-1]
+                            tools_used.update(call["name"] for call in last.tool_calls)
+                            response_text += last.content
+                        elif 'tools' in chunk:
+                            st.toast(chunk['tools']['messages'][-1].content)
+                        response_area.markdown(response_text)
+                    elapsed = time.perf_counter() - turn_start
+                    router.record_agent_turn(elapsed)
+                    response_cache.record_miss(elapsed)
+                    response_cache.store(prompt, response_text, tools_used, standalone=standalone)
+            logger.info("router stats: %s", router.stats())
+            logger.info("response cache stats: %s", response_cache.stats())
 
         # Append assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "content": response_text})
@@ -0,0 +1,19 @@
+import pytest
+
+from src.db import SessionLocal, init_db, make_engine
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    """A session on a fresh, migrated tickets database; crud helpers use it too."""
+    engine = make_engine(f"sqlite:///{tmp_path / 'tickets.db'}")
+    init_db(engine)
+    original_bind = SessionLocal.kw["bind"]
+    SessionLocal.configure(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        SessionLocal.configure(bind=original_bind)
+        engine.dispose()
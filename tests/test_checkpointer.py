@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from src.checkpointer import BoundedSqliteSaver, trim_messages_to_cap
+
+
+def _echo_graph(saver):
+    def reply(state: MessagesState):
+        return {"messages": [AIMessage(f"echo: {state['messages'][-1].content}")]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    return builder.compile(checkpointer=saver)
+
+
+def test_workers_sharing_a_file_see_each_others_turns(tmp_path):
+    path = tmp_path / "checkpoints.db"
+    workers = [_echo_graph(BoundedSqliteSaver(path)), _echo_graph(BoundedSqliteSaver(path))]
+    config = {"configurable": {"thread_id": "t1"}}
+    for turn in range(1, 5):  # turns alternate between the two processes' savers
+        workers[turn % 2].invoke({"messages": [("user", f"turn {turn}")]}, config)
+
+    messages = workers[0].get_state(config).values["messages"]
+    assert [m.content for m in messages if m.type == "human"] == ["turn 1", "turn 2", "turn 3", "turn 4"]
+
+
+def test_repeat_reads_are_served_from_the_hot_cache(tmp_path):
+    saver = BoundedSqliteSaver(tmp_path / "checkpoints.db")
+    graph = _echo_graph(saver)
+    config = {"configurable": {"thread_id": "t1"}}
+    graph.invoke({"messages": [("user", "hello")]}, config)
+
+    first = saver.get_tuple(config)
+    assert ("t1", "") in saver._hot
+    assert saver.get_tuple(config).config == first.config
+
+
+def _tool_turn(n):
+    call = {"name": "check_ticket", "args": {}, "id": f"call-{n}"}
+    return [HumanMessage(f"q{n}"), AIMessage("", tool_calls=[call]),
+            ToolMessage(f"r{n}", tool_call_id=f"call-{n}"), AIMessage(f"a{n}")]
+
+
+def test_trim_starts_on_a_user_message():
+    messages = _tool_turn(1) + _tool_turn(2)
+    for cap in range(1, len(messages) + 1):
+        trimmed = trim_messages_to_cap(messages, cap)
+        assert trimmed[0].type != "tool"
+        assert trimmed == messages[-len(trimmed):]
+    assert trim_messages_to_cap(messages, 5) == messages[4:]
+
+
+def test_trim_without_a_user_message_drops_orphaned_tool_results():
+    call = {"name": "faq_tool", "args": {}, "id": "c"}
+    messages = [HumanMessage("q"), AIMessage("", tool_calls=[call]),
+                ToolMessage("r1", tool_call_id="c"), ToolMessage("r2", tool_call_id="c"), AIMessage("a")]
+    assert trim_messages_to_cap(messages, 3) == messages[4:]
+    assert trim_messages_to_cap(messages, 4) == messages[1:]
@@ -0,0 +1,50 @@
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+from src.embedding_cache import CachedEmbeddings
+
+
+class AsymmetricEmbeddings(Embeddings):
+    """Queries and documents encode differently, like instruction-tuned models."""
+
+    def __init__(self):
+        self.query_calls = 0
+
+    def embed_documents(self, texts):
+        return [[0.0, 1.0] for _ in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return [1.0, float(len(text))]
+
+
+def test_batched_misses_use_the_query_encoder():
+    model = AsymmetricEmbeddings()
+    cache = CachedEmbeddings(model, "m")
+    vectors = cache.embed_queries(["reset password", "Reset password?", "track order"])
+    assert vectors == [[1.0, 14.0], [1.0, 14.0], [1.0, 11.0]]
+    assert model.query_calls == 2  # the duplicate is served from the batch
+    assert cache.embed_query("track order") == [1.0, 11.0] and model.query_calls == 2
+
+
+def test_disk_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    CachedEmbeddings(AsymmetricEmbeddings(), "m", disk_path=path).embed_query("reset password")
+
+    model = AsymmetricEmbeddings()
+    restarted = CachedEmbeddings(model, "m", disk_path=path, preload=0)
+    assert restarted.embed_query("reset password") == [1.0, 14.0]
+    assert model.query_calls == 0
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_memory_hits_do_not_wait_on_a_busy_disk(tmp_path):
+    cache = CachedEmbeddings(AsymmetricEmbeddings(), "m", disk_path=str(tmp_path / "cache.db"))
+    cache.embed_query("reset password")
+    result = []
+    with cache._disk_lock:  # e.g. a slow commit in another thread
+        reader = threading.Thread(target=lambda: result.append(cache.embed_query("reset password")))
+        reader.start()
+        reader.join(timeout=2)
+    assert result == [[1.0, 14.0]]
@@ -0,0 +1,31 @@
+from langchain_core.documents import Document
+
+from src.faq_bm25 import BM25Index
+
+
+def _row(category: str, question: str, answer: str) -> Document:
+    text = f"{category}\n{question}\n{answer}"
+    return Document(page_content=text.replace("\n", " \n "), metadata={"FAQ": text})
+
+
+ROWS = [
+    _row("Orders & Purchases", "Where is my order?", "Track your order via 'My Orders'."),
+    _row("Orders & Purchases", "Can I cancel my order?", "Orders can be canceled before shipping."),
+    _row("Technical", "What does ERR-1042 mean?", "Your session expired; sign in again."),
+]
+
+
+def test_verbatim_question_takes_the_fast_path():
+    index = BM25Index([str(i) for i in range(len(ROWS))], ROWS)
+    assert index.exact_match("can i cancel my order") is ROWS[1]
+    assert index.exact_match("  Where is my   order? ") is ROWS[0]
+
+
+def test_unique_code_token_takes_the_fast_path():
+    index = BM25Index([str(i) for i in range(len(ROWS))], ROWS)
+    assert index.exact_match("getting err-1042 on login") is ROWS[2]
+
+
+def test_other_queries_fall_through():
+    index = BM25Index([str(i) for i in range(len(ROWS))], ROWS)
+    assert index.exact_match("how do I cancel") is None
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from src.faq_index import PQ_NBITS, create_index, index_spec, train_index
+
+
+def _corpus(rows: int, dim: int = 96) -> np.ndarray:
+    return np.random.default_rng(0).standard_normal((rows, dim)).astype("float32")
+
+
+def test_ivfpq_rejects_a_corpus_too_small_for_its_codebooks():
+    vectors = _corpus(40)  # a spreadsheet-sized FAQ
+    with pytest.raises(ValueError, match="at least 256 training vectors"):
+        create_index(index_spec(type="ivfpq", pq_m=8), vectors.shape[1], len(vectors))
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf", "hnsw", "sq8"])
+def test_other_index_types_build_on_a_small_corpus(kind):
+    vectors = _corpus(40)
+    index = create_index(index_spec(type=kind), vectors.shape[1], len(vectors))
+    train_index(index, vectors)
+    index.add(vectors)
+    _, found = index.search(vectors[:5], 1)
+    assert index.ntotal == len(vectors)
+    assert found.shape == (5, 1)
+
+
+def test_ivfpq_trains_once_the_corpus_is_large_enough():
+    vectors = _corpus(2 ** PQ_NBITS)
+    index = create_index(index_spec(type="ivfpq", pq_m=8), vectors.shape[1], len(vectors))
+    train_index(index, vectors)
+    assert index.is_trained
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("faiss")
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src import faq_ingest
+
+
+def _row(category: str, question: str, answer: str) -> Document:
+    text = f"{category}\n{question}\n{answer}"
+    return Document(page_content=text.replace("\n", " \n "), metadata={"FAQ": text})
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    rows = [
+        _row("Orders", "Where is my order?", "Track it under 'My Orders'."),
+        _row("Orders", "Can I cancel my order?", "Yes, before it ships."),
+    ]
+    path = tmp_path / "faqs.xlsx"
+    path.write_bytes(b"workbook")
+    monkeypatch.setattr(faq_ingest, "load_faq_documents", lambda xlsx_path: list(rows))
+    return path, rows
+
+
+def test_row_ids_depend_on_the_question_only():
+    before = faq_ingest.assign_row_ids([_row("Orders", "Where is my order?", "Old answer.")])
+    after = faq_ingest.assign_row_ids([_row("Shipping", "Where is my  order?", "New answer.")])
+    assert list(before) == list(after)
+
+
+def test_answer_edit_syncs_as_an_update(workbook, tmp_path):
+    path, rows = workbook
+    embeddings = DeterministicFakeEmbedding(size=16)
+    index_dir = str(tmp_path / "index")
+    faq_ingest.build_faq_index(embeddings, str(path), index_dir)
+
+    rows[1] = _row("Orders", "Can I cancel my order?", "Yes, until it leaves the warehouse.")
+    store = FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+    summary = faq_ingest.sync_faq_index(store, str(path), index_dir)
+
+    assert summary == {"added": 0, "updated": 1, "deleted": 0, "unchanged": 1}
+    assert store.index.ntotal == 2
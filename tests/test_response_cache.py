@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from src import response_cache
+from src.response_cache import SemanticResponseCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    def embed(text):
+        vector = np.zeros(8, dtype="float32")
+        vector[hash(text.lower()) % 8] = 1.0
+        return vector
+
+    monkeypatch.setattr(response_cache, "get_faq_index_version", lambda: "v1")
+    monkeypatch.setattr(SemanticResponseCache, "_embed", staticmethod(embed))
+    return SemanticResponseCache()
+
+
+def test_standalone_faq_answer_is_reused_for_a_new_conversation(cache):
+    assert cache.store("how do refunds work here", "Refunds take 5 days.", {"faq_tool"}, standalone=True)
+    hit = cache.lookup("How do refunds work here?", standalone=True)
+    assert hit is not None and hit.response == "Refunds take 5 days."
+
+
+def test_mid_conversation_turns_are_neither_stored_nor_answered(cache):
+    assert not cache.store("what about refunds then", "As I said, Dana...", {"faq_tool"}, standalone=False)
+    cache.store("what about refunds then", "Refunds take 5 days.", {"faq_tool"}, standalone=True)
+    assert cache.lookup("what about refunds then", standalone=False) is None
+    assert cache.stats()["skipped"] == 1
+
+
+def test_ticket_actions_bypass_the_cache(cache):
+    assert not cache.store("please close my ticket now", "Done.", set(), standalone=True)
+    assert cache.lookup("please close my ticket now", standalone=True) is None
@@ -0,0 +1,21 @@
+from langchain_core.documents import Document
+
+from src import router
+from src.router import IntentRouter
+
+ROW = "Orders & Purchases\nWhere is my order?\nTrack your order via 'My Orders' after logging in."
+
+
+def test_faq_fast_path_replies_with_the_answer_only(monkeypatch):
+    doc = Document(page_content=ROW.replace("\n", " \n "), metadata={"FAQ": ROW})
+    monkeypatch.setattr(router, "faq_best_match", lambda message: (doc, 1.0, "lexical"))
+    result = IntentRouter().route("Where is the order I placed with you yesterday afternoon?")
+
+    assert result is not None and result.intent == "faq"
+    assert result.reply == "Track your order via 'My Orders' after logging in."
+    assert "Orders & Purchases" not in result.reply
+    assert "Where is my order?" not in result.reply
+
+
+def test_ticket_actions_fall_through_to_the_agent():
+    assert IntentRouter(use_embeddings=False).route("please close my ticket") is None
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from src import server
+
+
+def test_closing_the_turn_stream_finalizes_the_agent_stream(monkeypatch):
+    finalized = []
+
+    async def chat_events(thread_id, message, callbacks):
+        try:
+            yield {"event": "token", "text": "Hel"}
+            yield {"event": "token", "text": "lo"}
+            yield {"event": "done", "thread_id": thread_id, "reply": "Hello", "source": "agent"}
+        finally:
+            finalized.append(thread_id)
+
+    monkeypatch.setattr(server, "chat_events", chat_events)
+
+    async def disconnect_after_first_event():
+        events = server.safe_chat_events("t1", "hi")
+        first = await events.__anext__()
+        await events.aclose()  # what aclosing() does when the client goes away
+        return first, list(finalized)
+
+    first, finalized_on_close = asyncio.run(disconnect_after_first_event())
+    assert first["text"] == "Hel"
+    assert finalized_on_close == ["t1"]  # synchronously, not later by the garbage collector
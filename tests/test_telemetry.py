@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+from langchain_core.tools import tool
+
+from src import telemetry
+from src.async_tools import with_async
+from src.telemetry import span, trace_turn
+
+
+@pytest.fixture
+def sample_rate(monkeypatch):
+    def set_rate(rate):
+        monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", True)
+        monkeypatch.setattr(telemetry, "TELEMETRY_SAMPLE_RATE", rate)
+    return set_rate
+
+
+def _by_name(trace):
+    return {s["name"]: s for s in trace.spans}
+
+
+def test_spans_nest_under_the_enclosing_span(sample_rate):
+    sample_rate(1.0)
+    with trace_turn("turn") as trace:
+        with span("faq", "search"):
+            with span("faq", "embed"):
+                pass
+        with span("sql", "select"):
+            pass
+
+    spans = _by_name(trace)
+    assert spans["turn"]["parent_id"] is None
+    assert spans["search"]["parent_id"] == spans["turn"]["span_id"]
+    assert spans["embed"]["parent_id"] == spans["search"]["span_id"]
+    assert spans["select"]["parent_id"] == spans["turn"]["span_id"]
+    assert {s["trace_id"] for s in trace.spans} == {trace.trace_id}
+
+
+def test_context_reaches_async_tool_worker_threads(sample_rate):
+    sample_rate(1.0)
+    threads = []
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        threads.append(threading.current_thread().name)
+        with span("sql", "lookup"):
+            return query
+
+    async def call_tool():
+        return await with_async(lookup).ainvoke({"query": "x"})
+
+    with trace_turn("turn") as trace:
+        with span("step", "tools"):
+            assert asyncio.run(call_tool()) == "x"
+
+    spans = _by_name(trace)
+    assert threads[0].startswith("tool-db")
+    assert spans["lookup"]["parent_id"] == spans["tools"]["span_id"]
+
+
+def test_unsampled_turn_records_nothing(sample_rate):
+    sample_rate(0.0)
+    with trace_turn("turn") as trace:
+        with span("faq", "search") as current:
+            assert current is None
+    assert not trace.sampled
+    assert trace.spans == []
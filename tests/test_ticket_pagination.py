@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from src import crud
+from src.models import Ticket
+
+
+def _add_tickets(session, user: str, created: list):
+    base = datetime(2024, 1, 1)
+    for i, hours in enumerate(created):
+        session.add(Ticket(id=f"{user}-{i:03d}", user=user, subject="s", description="d",
+                           created_at=base + timedelta(hours=hours or 0)))
+    session.flush()
+    # created_at has a column default, so NULLs (legacy rows) are written afterwards
+    undated = [f"{user}-{i:03d}" for i, hours in enumerate(created) if hours is None]
+    session.execute(update(Ticket).where(Ticket.id.in_(undated)).values(created_at=None))
+    session.commit()
+
+
+def _all_pages(session, page_size: int, **filters):
+    ids, token, pages = [], None, 0
+    while True:
+        page, token = crud.list_tickets_page(session, page_size=page_size, page_token=token, **filters)
+        ids += [t.id for t in page]
+        pages += 1
+        if token is None:
+            return ids, pages
+
+
+def test_pages_cover_every_ticket_newest_first_with_nulls_last(db_session):
+    # ties on created_at and tickets without one, spread across page boundaries
+    _add_tickets(db_session, "alice", [5, None, 3, 5, None, 1, 5, 3, None, 2, 4])
+    _add_tickets(db_session, "bob", [1, 2])
+
+    ids, pages = _all_pages(db_session, page_size=3, user="alice")
+
+    tickets = db_session.query(Ticket).filter(Ticket.user == "alice").all()
+    expected = sorted(tickets, key=lambda t: (t.created_at is not None, t.created_at or datetime.min, t.id), reverse=True)
+    assert ids == [t.id for t in expected]
+    assert pages == 4
+    assert ids[-3:] == ["alice-008", "alice-004", "alice-001"]  # undated tickets, by id
+
+
+def test_token_taken_inside_the_undated_tail(db_session):
+    _add_tickets(db_session, "alice", [None, None, None, 1])
+    first, token = crud.list_tickets_page(db_session, user="alice", page_size=2)
+    second, token = crud.list_tickets_page(db_session, user="alice", page_size=2, page_token=token)
+    assert [t.id for t in first] == ["alice-003", "alice-002"]
+    assert [t.id for t in second] == ["alice-001", "alice-000"]
+    assert token is None
+
+
+@pytest.mark.parametrize("token", ["not-a-token", "e30", "eyJjIjoibm90LWEtZGF0ZSIsImkiOiJ4In0"])
+def test_invalid_page_token_is_rejected(db_session, token):
+    with pytest.raises(ValueError, match="Invalid page token"):
+        crud.list_tickets_page(db_session, page_token=token)
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from src import crud
+from src.models import PriorityLevel, Ticket, TicketStatus
+
+
+def _aggregate_stats(session):
+    """ticket_stats computed from the tickets table, as on a database without the counter tables."""
+    session.execute(text("DROP TABLE ticket_counters"))
+    session.execute(text("DROP TABLE ticket_resolution_buckets"))
+    try:
+        return crud.ticket_stats(session)
+    finally:
+        session.rollback()
+
+
+def test_counters_match_the_aggregate_after_bulk_changes(db_session):
+    base = datetime(2024, 1, 1)
+    tickets = [
+        Ticket(id=f"t{i:02d}", user="alice", subject="s", description="d",
+               priority=list(PriorityLevel)[i % 4], category=["billing", "login", None][i % 3],
+               assigned_to=["sam", None][i % 2], created_at=base + timedelta(hours=i))
+        for i in range(30)
+    ]
+    db_session.add_all(tickets)
+    db_session.commit()
+
+    for i, ticket in enumerate(tickets[:20]):
+        ticket.status = TicketStatus.closed if i % 2 else TicketStatus.in_progress
+        ticket.closed_at = ticket.created_at + timedelta(hours=3 * i) if i % 2 else None
+        ticket.assigned_to = "kim" if i % 5 == 0 else ticket.assigned_to
+    db_session.commit()
+    closed = sum(1 for i, t in enumerate(tickets) if t.status == TicketStatus.closed and i % 7)
+    for ticket in tickets[::7]:
+        db_session.delete(ticket)
+    db_session.commit()
+
+    stats = crud.ticket_stats(db_session)
+    assert stats["total"] == 30 - len(tickets[::7])
+    assert stats["by_status"]["Closed"] == stats["resolution_hours"]["count"] == closed
+    assert stats == _aggregate_stats(db_session)
+
+
+def test_empty_database(db_session):
+    stats = crud.ticket_stats(db_session)
+    assert stats["total"] == 0
+    assert stats["resolution_hours"]["count"] == 0
+    assert stats["resolution_hours"]["p50"] is None